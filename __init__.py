@@ -1,23 +1,82 @@
 from __future__ import annotations
+import logging
+import time
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
 
-from .const import DOMAIN
-from .coordinator import RemoCoordinator
+from .const import DOMAIN, CONF_APPLIANCE_ID
+from .coordinator import RemoCoordinator, async_join_account, async_leave_account, async_remove_cache
+from .local import async_remove_signals
+
+_LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.CLIMATE]
+PLATFORMS: list[Platform] = [Platform.CLIMATE, Platform.SENSOR]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    coord = RemoCoordinator(hass, entry)
-    await coord.async_config_entry_first_refresh()
+    started = time.monotonic()
+    # 同一トークンのACは1つの共有ポーラーに相乗りする
+    hub = async_join_account(hass, entry)
+    coord = RemoCoordinator(hass, entry, hub)
+    if coord.local is not None:
+        await coord.local.async_load()
+    if await coord.async_load_cache():
+        # 前回の能力表・状態で即座にエンティティを出し、クラウドからの取得は裏で行う
+        coord.async_attach()
+        coord.async_start_background_refresh()
+    else:
+        try:
+            await coord.async_config_entry_first_refresh()
+        except Exception:
+            await async_leave_account(hass, hub, entry.entry_id)
+            raise
+        coord.async_attach()
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coord
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    coord.setup_duration = time.monotonic() - started
+    _LOGGER.debug(
+        "Set up %s in %.3f s (from cache: %s)",
+        entry.title, coord.setup_duration, coord.restored_from_cache,
+    )
+    return True
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    if entry.version == 1:
+        # v1 は unique_id がユーザーID。同じACを追加し直したときに重複を弾けるようアプライアンスIDにする
+        appliance_id = entry.data[CONF_APPLIANCE_ID]
+        duplicate = next(
+            (
+                e for e in hass.config_entries.async_entries(DOMAIN)
+                if e.entry_id != entry.entry_id and e.unique_id == appliance_id
+            ),
+            None,
+        )
+        if duplicate is not None:
+            _LOGGER.error(
+                "Cannot migrate %s: appliance %s is already configured by %s",
+                entry.title, appliance_id, duplicate.title,
+            )
+            return False
+        hass.config_entries.async_update_entry(entry, unique_id=appliance_id, version=2)
+        _LOGGER.debug("Migrated %s to version 2 (unique_id=%s)", entry.title, appliance_id)
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # オプション変更時は再読み込みして反映
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coord: RemoCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        coord.async_detach()
+        await coord.async_shutdown()
+        await async_leave_account(hass, coord.hub, entry.entry_id)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await async_remove_cache(hass, entry.entry_id)
+    await async_remove_signals(hass, entry.entry_id)
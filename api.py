@@ -1,90 +1,480 @@
 # custom_components/hass_nature_remo_climate/api.py
 from __future__ import annotations
+from bisect import bisect_left
 from typing import Any
+import asyncio
+import logging
+import random
+import re
+import time
 
 import aiohttp
 
+from homeassistant.util.json import json_loads
+
+from .transport import AiohttpTransport, RemoTransport
+
+_LOGGER = logging.getLogger(__name__)
+
 class RemoAuthError(Exception):
     pass
 
 class RemoConnectionError(Exception):
     pass
 
+class RemoRateLimitError(RemoConnectionError):
+    """429 Too Many Requests"""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RemoTransientError(RemoConnectionError):
+    """タイムアウト・接続失敗・5xx（再試行すれば通る可能性があるもの）"""
+
+
+class RemoCircuitOpenError(RemoConnectionError):
+    """サーキットブレーカーが開いているため送信しなかった"""
+
+    def __init__(self, message: str, retry_in: float) -> None:
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class RemoCircuitBreaker:
+    """連続失敗がthreshold回に達したらcooldown秒だけ送信を止める
+
+    cooldown後は1リクエストだけ試し（half-open）、成功すれば閉じ、失敗すればまた開く。
+    """
+
+    __slots__ = ("threshold", "cooldown", "failures", "opened_at", "_probing", "trips")
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None   # 開いた時刻（monotonic）
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._probing or self.retry_in() == 0 else "open"
+
+    def retry_in(self, now: float | None = None) -> float:
+        """次に送信を試せるまでの秒数（閉じていれば0）"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - (now if now is not None else time.monotonic()))
+
+    def before_request(self) -> None:
+        if self.opened_at is None:
+            return
+        retry_in = self.retry_in()
+        if retry_in > 0 or self._probing:
+            raise RemoCircuitOpenError("Circuit open", retry_in or self.cooldown)
+        self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            if self.opened_at is None or self._probing:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_aborted(self) -> None:
+        """結果の分からないまま終わった試行（取り消しなど）。half-openの試行なら失敗として開き直す"""
+        if self._probing:
+            self.record_failure()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": self.retry_in(),
+            "trips": self.trips,
+        }
+
+
+class RemoRateLimit:
+    """レスポンスヘッダ X-Rate-Limit-* から得たトークン単位のレート制限状態"""
+
+    __slots__ = ("limit", "remaining", "reset", "retry_at")
+
+    def __init__(self) -> None:
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: float | None = None      # ウィンドウがリセットされる時刻（epoch秒）
+        self.retry_at: float | None = None   # 429のRetry-Afterから求めた再試行可能時刻（epoch秒）
+
+    def update(self, headers) -> None:
+        self.limit = _int_header(headers, "X-Rate-Limit-Limit", self.limit)
+        self.remaining = _int_header(headers, "X-Rate-Limit-Remaining", self.remaining)
+        reset = _int_header(headers, "X-Rate-Limit-Reset", None)
+        if reset is not None:
+            self.reset = float(reset)
+
+    def seconds_until_reset(self, now: float | None = None) -> float | None:
+        if self.reset is None:
+            return None
+        return max(0.0, self.reset - (now if now is not None else time.time()))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset": self.reset,
+            "retry_at": self.retry_at,
+        }
+
+
+def _int_header(headers, name: str, default: int | None) -> int | None:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+# レイテンシのヒストグラムの上限値（秒）。最後は上限なし
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+_ID_SEGMENT = re.compile(r"^/(appliances|devices|signals)/[^/]+")
+
+
+def _endpoint(path: str) -> str:
+    """/appliances/<id>/aircon_settings → /appliances/{id}/aircon_settings"""
+    return _ID_SEGMENT.sub(r"/\1/{id}", path)
+
+
+class _EndpointStats:
+    __slots__ = ("count", "errors", "latency_total", "latency_max", "histogram", "statuses", "bytes_received")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+        self.statuses: dict[str, int] = {}
+        self.bytes_received = 0
+
+    def record(self, latency: float, status: str, size: int, error: bool) -> None:
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_received += size
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "latency_avg": self.latency_total / self.count if self.count else None,
+            "latency_max": self.latency_max,
+            "latency_histogram": {
+                ("+Inf" if b == float("inf") else f"le_{b}"): n for b, n in zip(LATENCY_BUCKETS, self.histogram)
+            },
+            "statuses": dict(self.statuses),
+            "bytes_received": self.bytes_received,
+        }
+
+
+class RemoApiStats:
+    """メソッド×エンドポイントごとのリクエスト数・レイテンシ・ステータス・受信バイト数"""
+
+    def __init__(self) -> None:
+        self._endpoints: dict[tuple[str, str], _EndpointStats] = {}
+
+    def record(self, method: str, path: str, latency: float, status: str, size: int = 0, error: bool = False) -> None:
+        key = (method, _endpoint(path))
+        stats = self._endpoints.get(key)
+        if stats is None:
+            stats = self._endpoints[key] = _EndpointStats()
+        stats.record(latency, status, size, error)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(s.count for s in self._endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(s.errors for s in self._endpoints.values())
+
+    @property
+    def bytes_received(self) -> int:
+        return sum(s.bytes_received for s in self._endpoints.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {f"{m} {p}": s.as_dict() for (m, p), s in sorted(self._endpoints.items())}
+
+
 class NatureRemoApi:
     BASE = "https://api.nature.global/1"
 
-    def __init__(self, token: str) -> None:
-        self._token = token
-
-    async def _req(self, method: str, path: str, data: dict[str, Any] | None = None) -> Any:
-        headers = {
-            "Authorization": f"Bearer {self._token}",
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        token: str,
+        coalesce_window: float = 0.0,
+        base_url: str | None = None,
+        transport: RemoTransport | None = None,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        breaker: RemoCircuitBreaker | None = None,
+    ) -> None:
+        # セッションは呼び出し側（HA共有のClientSession）が所有する。
+        # 毎回作り直すとリクエストごとにTCP+TLSハンドシェイクが走るため、keep-aliveで使い回す
+        self._session = session
+        # 実際の送受信を担う層（記録・再生用のトランスポートに差し替えられる）
+        self._transport: RemoTransport = transport or AiohttpTransport(session)
+        # 既定はNatureのクラウド。ローカルの擬似サーバーなどに向ける場合は差し替える
+        self._base = (base_url or self.BASE).rstrip("/")
+        self._headers = {
+            "Authorization": f"Bearer {token}",
             "Accept": "application/json",
         }
-        async with aiohttp.ClientSession(headers=headers) as sess:
-            async with sess.request(method, f"{self.BASE}{path}", data=data) as r:
-                if r.status == 401:
-                    raise RemoAuthError("Unauthorized")
-                try:
-                    r.raise_for_status()
-                except aiohttp.ClientResponseError as e:
-                    raise RemoConnectionError(str(e)) from e
-                # /aircon_settings は本文が空のこともあるのでJSONでなくてOK
-                if r.content_type == "application/json":
-                    return await r.json()
-                return await r.text()
-
-    async def async_get_user_and_appliances(self) -> dict:
-        me = await self._req("GET", "/users/me")
-        apps = await self._req("GET", "/appliances")
-        return {"user_id": me.get("id"), "appliances": apps}
+        self.rate_limit = RemoRateLimit()
+        self.stats = RemoApiStats()
+        # 1リクエストあたりのタイムアウト（秒）と、一時的な失敗の再試行回数・待ち時間の基準（秒）
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self.breaker = breaker or RemoCircuitBreaker()
+        # ACごとの送信待ちaircon_settings（送信中に届いた呼び出しを次の1回のPOSTにまとめる）
+        self._coalesce_window = coalesce_window
+        self._pending_settings: dict[str, _PendingSettings] = {}
+        # 送信キューが動いているAC（ACごとにPOSTは常に1本だけ）
+        self._sending: set[str] = set()
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    async def _req(self, method: str, path: str, data: dict[str, Any] | None = None) -> Any:
+        # GETと/aircon_settings（絶対値の設定なので何度送っても同じ結果）だけ再試行する
+        retries = self._retries if method == "GET" or path.endswith("/aircon_settings") else 0
+        attempt = 0
+        while True:
+            # クラウドが落ちている間はリクエストを積み上げず即失敗させる
+            self.breaker.before_request()
+            try:
+                result = await self._req_once(method, path, data)
+            except RemoTransientError as e:
+                self.breaker.record_failure()
+                if attempt >= retries or self.breaker.opened_at is not None:
+                    raise
+                attempt += 1
+                # 指数バックオフ＋ジッタ（同時に失敗した呼び出しが揃って再送しないように）
+                delay = self._backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                _LOGGER.debug("%s %s failed (%s), retry %d/%d in %.2fs", method, path, e, attempt, retries, delay)
+                await asyncio.sleep(delay)
+                continue
+            except (RemoAuthError, RemoConnectionError):
+                # 401/429/その他4xxはサーバーが応答している→ブレーカーとしては成功扱い
+                self.breaker.record_success()
+                raise
+            except Exception:
+                # 不正なJSONなど想定外の失敗も失敗として数える
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # 取り消されてもhalf-openの試行を残さない（残すと二度と試せなくなる）
+                self.breaker.record_aborted()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _req_once(self, method: str, path: str, data: dict[str, Any] | None) -> Any:
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self._timeout):
+                r = await self._transport.request(method, f"{self._base}{path}", self._headers, data)
+        except TimeoutError as e:
+            self.stats.record(method, path, time.monotonic() - started, "timeout", error=True)
+            raise RemoTransientError(f"Timeout after {self._timeout}s, method={method}, path={path}") from e
+        except aiohttp.ClientError as e:
+            self.stats.record(method, path, time.monotonic() - started, type(e).__name__, error=True)
+            raise RemoTransientError(str(e)) from e
+        self.stats.record(method, path, time.monotonic() - started, str(r.status), len(r.body), error=r.status >= 400)
+        # 全レスポンスのヘッダからレート制限の残量を拾う（コマンドも同じ枠を消費する）
+        self.rate_limit.update(r.headers)
+        if r.status == 401:
+            raise RemoAuthError("Unauthorized")
+        if r.status == 429:
+            retry_after = _int_header(r.headers, "Retry-After", None)
+            if retry_after is None:
+                retry_after = self.rate_limit.seconds_until_reset()
+            if retry_after is not None:
+                self.rate_limit.retry_at = time.time() + retry_after
+            raise RemoRateLimitError("Rate limited", retry_after)
+        if r.status >= 500:
+            raise RemoTransientError(f"{r.status}, method={method}, path={path}")
+        if r.status >= 400:
+            raise RemoConnectionError(f"{r.status}, method={method}, path={path}")
+        # /aircon_settings は本文が空のこともあるのでJSONでなくてOK
+        if r.content_type == "application/json":
+            # HAのJSONデコーダ（orjson）で復号する
+            return json_loads(r.body) if r.body else None
+        return r.body.decode("utf-8", errors="replace")
+
+    async def async_get_account(self, timeout: float | None = None) -> dict:
+        """アカウントの /users/me・/appliances・/devices を並行に取得する（devices は初回ポーリングへの引き継ぎ用）"""
+        try:
+            async with asyncio.timeout(timeout):
+                results = await asyncio.gather(
+                    self._req("GET", "/users/me"),
+                    self._req("GET", "/appliances"),
+                    self._req("GET", "/devices"),
+                    return_exceptions=True,
+                )
+        except TimeoutError as e:
+            raise RemoConnectionError(f"Timeout after {timeout}s") from e
+        # 認証エラーを優先して返す
+        for r in results:
+            if isinstance(r, RemoAuthError):
+                raise r
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+        me, apps, devs = results
+        return {"user_id": (me or {}).get("id"), "appliances": apps or [], "devices": devs or []}
 
     # ===== 制御系 =====
 
+    async def async_update_settings(self, appliance_id: str, data: dict[str, str]) -> Any:
+        """/aircon_settings にPOSTする。
+
+        同じACへのPOSTは順番に1本ずつ送る（追い越しで古い値が最後に届くのを防ぐ）。
+        送信中でなければすぐに送り、前のPOSTの送信中に届いた呼び出しは
+        次の1回のPOSTに後勝ちでまとめ、全員に合成後のレスポンス（=新しい設定値）を返す。
+        coalesce_window（秒、既定0）を指定すると、送信中でなくてもその間は待ってまとめる。
+        """
+        pending = self._pending_settings.get(appliance_id)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = self._pending_settings[appliance_id] = _PendingSettings(loop.create_future())
+            if appliance_id not in self._sending:
+                # 送信中なら、その送信が終わり次第このバッチも送られる
+                self._sending.add(appliance_id)
+                if self._coalesce_window > 0:
+                    loop.call_later(self._coalesce_window, self._start_flush_settings, appliance_id)
+                else:
+                    # 同じループの周回で届いた呼び出し（gather等）だけまとめて、すぐ送る
+                    loop.call_soon(self._start_flush_settings, appliance_id)
+        _merge_settings(pending.data, data)
+        # 呼び出し元がキャンセルされても他の待ち手のためにPOSTは続ける
+        return await asyncio.shield(pending.future)
+
+    def _start_flush_settings(self, appliance_id: str) -> None:
+        task = asyncio.ensure_future(self._flush_settings(appliance_id))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_settings(self, appliance_id: str) -> None:
+        # 送信中に溜まったバッチが無くなるまで、1本ずつ順に送る
+        try:
+            while (pending := self._pending_settings.pop(appliance_id, None)) is not None:
+                try:
+                    res = await self._req(
+                        "POST",
+                        f"/appliances/{appliance_id}/aircon_settings",
+                        data=pending.data,
+                    )
+                except Exception as e:  # 待ち手それぞれに同じ例外を返す
+                    pending.future.set_exception(e)
+                else:
+                    pending.future.set_result(res)
+        finally:
+            self._sending.discard(appliance_id)
+            # キャンセルで抜けた場合、取り残されたバッチの待ち手を解放する
+            if (pending := self._pending_settings.pop(appliance_id, None)) is not None:
+                pending.future.cancel()
+
     async def async_set_power(self, appliance_id: str, on: bool) -> Any:
         # Remoは電源OFFのみ明示的: button=power-off
         data = {"button": "power-off"} if not on else {}
-        return await self._req("POST", f"/appliances/{appliance_id}/aircon_settings", data=data)
+        return await self.async_update_settings(appliance_id, data)
 
     async def async_set_mode(self, appliance_id: str, mode: str) -> Any:
         # mode: "off" | "auto" | "warm" | "cool" | "dry" | "blow"
         if mode == "off":
             return await self.async_set_power(appliance_id, False)
-        return await self._req(
-            "POST",
-            f"/appliances/{appliance_id}/aircon_settings",
-            data={"operation_mode": mode},
-        )
+        return await self.async_update_settings(appliance_id, {"operation_mode": mode})
 
     async def async_set_temperature(self, appliance_id: str, temp_c: float) -> Any:
         """温度を0.5℃単位で設定（整数は小数点なし）"""
-        # 0.5単位に丸め
-        rounded = round(temp_c * 2) / 2
-        # .0 は付けない
-        temp_str = str(int(rounded)) if rounded.is_integer() else str(rounded)
-        return await self._req(
-            "POST",
-            f"/appliances/{appliance_id}/aircon_settings",
-            data={"temperature": temp_str},
-        )
+        return await self.async_update_settings(appliance_id, {"temperature": format_temperature(temp_c)})
 
     async def async_set_fan(self, appliance_id: str, fan: str) -> Any:
-        return await self._req(
-            "POST",
-            f"/appliances/{appliance_id}/aircon_settings",
-            data={"air_volume": fan},
-        )
+        return await self.async_update_settings(appliance_id, {"air_volume": fan})
 
     async def async_set_swing_horizontal(self, appliance_id: str, swing_horizontal: str) -> Any:
-        return await self._req(
-            "POST",
-            f"/appliances/{appliance_id}/aircon_settings",
-            data={"air_direction_h": swing_horizontal},
-        )
+        return await self.async_update_settings(appliance_id, {"air_direction_h": swing_horizontal})
 
     async def async_set_swing(self, appliance_id: str, swing: str) -> Any:
-        return await self._req(
-            "POST",
-            f"/appliances/{appliance_id}/aircon_settings",
-            data={"air_direction": swing},
-        )
+        return await self.async_update_settings(appliance_id, {"air_direction": swing})
+
+
+class NatureRemoLocalApi:
+    """Remo本体のLAN内API（http://<host>/messages）"""
+
+    def __init__(self, session: aiohttp.ClientSession, host: str, timeout: float = 5.0) -> None:
+        self._session = session
+        self._base = f"http://{host}"
+        self._headers = {
+            # ローカルAPIはこのヘッダが無いと受け付けない
+            "X-Requested-With": "local",
+            "Accept": "application/json",
+        }
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def async_get_last_message(self) -> dict[str, Any]:
+        """最後に受信した赤外線フレーム {"format": "us", "freq": 38, "data": [...]}"""
+        try:
+            async with self._session.get(
+                f"{self._base}/messages", headers=self._headers, timeout=self._timeout
+            ) as r:
+                r.raise_for_status()
+                return await r.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RemoConnectionError(str(e)) from e
+
+    async def async_send_message(self, message: dict[str, Any]) -> None:
+        try:
+            async with self._session.post(
+                f"{self._base}/messages", headers=self._headers, json=message, timeout=self._timeout
+            ) as r:
+                r.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RemoConnectionError(str(e)) from e
+
+
+class _PendingSettings:
+    __slots__ = ("data", "future")
+
+    def __init__(self, future: asyncio.Future) -> None:
+        self.data: dict[str, str] = {}
+        self.future = future
+        # 待ち手が全員キャンセルされても "exception was never retrieved" を出さない
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+def _merge_settings(merged: dict[str, str], data: dict[str, str]) -> None:
+    """後勝ちで合成。電源OFFの後に運転系の設定が来たらOFFは取り消す"""
+    if data and "button" not in data and merged.get("button") == "power-off":
+        merged.pop("button")
+    merged.update(data)
+
+
+def format_temperature(temp_c: float) -> str:
+    """0.5℃単位に丸め、整数なら小数点なしの文字列にする"""
+    rounded = round(temp_c * 2) / 2
+    return str(int(rounded)) if rounded.is_integer() else str(rounded)
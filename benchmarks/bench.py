@@ -0,0 +1,44 @@
+"""ベンチマーク結果の集計と出力"""
+from __future__ import annotations
+from pathlib import Path
+
+_REPORTS: dict[str, list[dict]] = {}
+
+
+def report(table: str, **row) -> None:
+    """表 table に1行追加する（列は最初の行のキー順）"""
+    _REPORTS.setdefault(table, []).append(row)
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def render() -> list[str]:
+    lines: list[str] = []
+    for table, rows in _REPORTS.items():
+        columns = list(rows[0])
+        cells = [[_format(r.get(c, "")) for c in columns] for r in rows]
+        widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(columns)]
+        lines.append(f"== {table} ==")
+        lines.append("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+        lines.extend("  ".join(v.rjust(w) for v, w in zip(row, widths)) for row in cells)
+        lines.append("")
+    return lines
+
+
+def write(path: Path) -> list[str]:
+    lines = render()
+    if lines:
+        path.write_text("\n".join(lines), encoding="utf-8")
+    return lines
@@ -0,0 +1,39 @@
+"""ベンチマーク共通: tests/ の擬似サーバーとヘルパーを使い、結果を表にまとめて出力する
+
+実行: pytest benchmarks（結果は末尾のサマリと bench_output.txt に出る）
+"""
+from __future__ import annotations
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+
+import bench  # noqa: E402
+from common import ROOT, auto_enable_custom_integrations, unload_entries  # noqa: E402,F401
+from fake_nature import FakeAccount, FakeNatureServer  # noqa: E402
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi  # noqa: E402
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config) -> None:
+    for line in bench.write(ROOT / "bench_output.txt"):
+        terminalreporter.write_line(line)
+
+
+@pytest.fixture
+async def start_fake_nature(monkeypatch, socket_enabled):
+    """規模・遅延を指定して擬似サーバーを起動する（テスト終了時に停止）"""
+    servers: list[FakeNatureServer] = []
+
+    async def _start(account: FakeAccount, **kwargs) -> FakeNatureServer:
+        server = FakeNatureServer(account, **kwargs)
+        await server.start()
+        monkeypatch.setattr(NatureRemoApi, "BASE", server.url)
+        servers.append(server)
+        return server
+
+    yield _start
+    for server in servers:
+        await server.close()
@@ -0,0 +1,51 @@
+"""1回の更新でACの分を切り出す処理: 能力表を毎回作り直す場合と、range が同じなら使い回す場合
+
+実際のACに近い payload（5モード、0.5℃刻みの温度・風量・風向）で RemoCoordinator._apply を繰り返す。
+"""
+from __future__ import annotations
+import time
+
+from bench import report
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeAccount
+
+from custom_components.hass_nature_remo_climate.coordinator import _build_capabilities
+
+ITERATIONS = 2000
+
+
+def _per_call_us(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+async def test_capability_cache(hass, start_fake_nature, unload_entries) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=1))
+    entries = await async_setup_acs(hass, server, 1)
+    coord = hass.data[DOMAIN][entries[0].entry_id]
+    account = coord.hub.data
+    apps_ac = account["appliances"][coord.appliance_id]
+    devs_brdg = account["devices"][apps_ac["device"]["id"]]
+
+    def rebuild() -> None:
+        coord._capabilities = None
+        coord._apply(apps_ac, devs_brdg)
+
+    rebuild_us = _per_call_us(rebuild)
+    build_only_us = _per_call_us(lambda: _build_capabilities(apps_ac))
+    rebuilds = coord.capability_rebuilds
+    cached_us = _per_call_us(lambda: coord._apply(apps_ac, devs_brdg))
+
+    report(
+        "capabilities",
+        rebuild_us=rebuild_us,
+        cached_us=cached_us,
+        build_capabilities_us=build_only_us,
+        speedup=f"{rebuild_us / cached_us:.1f}x",
+    )
+    # range が変わらない限り作り直さない
+    assert coord.capability_rebuilds == rebuilds
+    assert not coord.settings_changed and not coord.sensors_changed
+    assert cached_us < rebuild_us
@@ -0,0 +1,46 @@
+"""共有ポーラーの1回の取得: /appliances と /devices を並行に投げた場合と順に投げた場合
+
+並行側は共有ポーラーの実際の更新（last_fetch_timing）を、順次側は同じ2本を続けて待った時間を測る。
+"""
+from __future__ import annotations
+import time
+
+import pytest
+
+from bench import report
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeAccount
+
+ROUNDS = 10
+
+
+@pytest.mark.parametrize("latency", [0.05, 0.1, 0.3])
+async def test_concurrent_fetch(hass, start_fake_nature, unload_entries, latency: float) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=2, other_appliances=10, signals=10), latency=latency)
+    await async_setup_acs(hass, server, 2)
+    hub = next(iter(hass.data[DOMAIN]["accounts"].values()))
+
+    concurrent = []
+    for _ in range(ROUNDS):
+        await hub.async_refresh()
+        assert hub.last_update_success
+        concurrent.append(hub.last_fetch_timing["total"])
+
+    sequential = []
+    for _ in range(ROUNDS):
+        started = time.monotonic()
+        await hub._timed_req("/appliances")
+        await hub._timed_req("/devices")
+        sequential.append(time.monotonic() - started)
+
+    concurrent_avg = sum(concurrent) / ROUNDS
+    sequential_avg = sum(sequential) / ROUNDS
+    report(
+        "fetch",
+        latency_s=latency,
+        concurrent_ms=concurrent_avg * 1000,
+        sequential_ms=sequential_avg * 1000,
+        saved=f"{1 - concurrent_avg / sequential_avg:.0%}",
+    )
+    # 並行なら遅い方の1往復ぶん、順次なら2往復ぶんかかる
+    assert concurrent_avg < sequential_avg * 0.8
@@ -0,0 +1,72 @@
+"""大きなアカウントの /appliances: 丸ごと保持する場合と、使うACの使う項目だけに絞る場合
+
+他の家電・学習済み信号の多いアカウントで、1回の更新あたりの復号・絞り込みの時間と、更新後も残るメモリを比べる。
+"""
+from __future__ import annotations
+import json
+import time
+import tracemalloc
+
+import pytest
+from homeassistant.util.json import json_loads
+
+from bench import report
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeAccount
+
+ROUNDS = 20
+
+
+def _retained(build) -> tuple[object, int]:
+    """build() の戻り値と、それが保持しているバイト数（復号の一時的な確保は含めない）"""
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+@pytest.mark.parametrize(("others", "signals"), [(20, 10), (100, 30), (300, 50)])
+async def test_selective_parse(hass, start_fake_nature, unload_entries, others: int, signals: int) -> None:
+    server = await start_fake_nature(
+        FakeAccount.generate(acs=4, other_appliances=others, signals=signals, smart_meters=1)
+    )
+    await async_setup_acs(hass, server, 4)
+    hub = next(iter(hass.data[DOMAIN]["accounts"].values()))
+    wanted = hub.appliance_ids
+    apps_body = json.dumps(server.account.appliances).encode()
+    devs_body = json.dumps(server.account.devices).encode()
+
+    def full() -> dict:
+        # 以前の実装: 全体を復号し、該当ACの生の dict（signals なども含む）をそのまま持つ
+        apps, devs = json_loads(apps_body), json_loads(devs_body)
+        return {
+            "appliances": {a["id"]: a for a in apps if a["id"] in wanted},
+            "devices": {d["id"]: d for d in devs},
+        }
+
+    def selective() -> dict:
+        return hub._build_account(json_loads(apps_body), json_loads(devs_body), time.monotonic())
+
+    timings = {}
+    for name, build in (("full", full), ("selective", selective)):
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            build()
+        timings[name] = (time.perf_counter() - started) / ROUNDS
+    raw, raw_size = _retained(full)
+    slim, slim_size = _retained(selective)
+
+    report(
+        "parse",
+        appliances=len(server.account.appliances),
+        signals_per_appliance=signals,
+        body_kib=len(apps_body) / 1024,
+        full_ms=timings["full"] * 1000,
+        selective_ms=timings["selective"] * 1000,
+        full_retained_kib=raw_size / 1024,
+        selective_retained_kib=slim_size / 1024,
+    )
+    assert set(slim["appliances"]) == set(raw["appliances"]) == wanted
+    assert all("signals" not in a for a in slim["appliances"].values())
+    assert slim_size < raw_size
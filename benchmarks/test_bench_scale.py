@@ -0,0 +1,96 @@
+"""AC台数ごとの、リクエスト数/分・コマンドのレイテンシ・更新時間・メモリ
+
+NatureRemoApi・共有ポーラー・NatureRemoClimate を HA のテストハーネス上で擬似サーバーに対して動かす。
+"""
+from __future__ import annotations
+import time
+import tracemalloc
+
+import pytest
+from homeassistant.components.climate import DOMAIN as CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+
+from bench import percentile, report
+from common import DOMAIN, async_setup_acs, async_unload_all, climate_entity_id
+from fake_nature import FakeAccount
+
+# 初回のモジュール読み込みをメモリの計測に含めないよう、先に読み込んでおく
+from homeassistant.components import sensor  # noqa: F401,E402
+from custom_components.hass_nature_remo_climate import climate, sensor as remo_sensor  # noqa: F401,E402
+
+LATENCY = 0.02   # 擬似サーバーの応答遅延（秒）
+REFRESHES = 10
+COMMANDS = 20
+_FRAMES = 25     # インテグレーションから呼んだHA側での確保も拾えるだけのフレーム数
+
+
+def _integration_memory(snapshot: tracemalloc.Snapshot) -> int:
+    """インテグレーションのコードを経由して確保され、まだ残っているバイト数
+
+    HA本体の初回読み込み（翻訳・マニフェスト等）は AC 台数と関係ないので数えない。
+    """
+    only = tracemalloc.Filter(True, f"*/custom_components/{DOMAIN}/*", all_frames=True)
+    return sum(stat.size for stat in snapshot.filter_traces([only]).statistics("filename"))
+
+
+@pytest.mark.parametrize("acs", [1, 5, 10, 25, 50])
+async def test_scale(hass, start_fake_nature, acs: int) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=acs, other_appliances=acs, signals=10), latency=LATENCY)
+
+    started = time.monotonic()
+    await async_setup_acs(hass, server, acs)
+    setup = time.monotonic() - started
+
+    hub = next(iter(hass.data[DOMAIN]["accounts"].values()))
+    server.reset_counts()
+    durations = []
+    for _ in range(REFRESHES):
+        started = time.monotonic()
+        await hub.async_refresh()
+        durations.append(time.monotonic() - started)
+    requests_per_refresh = server.count() / REFRESHES
+    interval = hub.update_interval.total_seconds()
+
+    latencies = []
+    entity_ids = [climate_entity_id(hass, ac["id"]) for ac in server.account.acs]
+    for i in range(COMMANDS):
+        started = time.monotonic()
+        await hass.services.async_call(
+            CLIMATE_DOMAIN,
+            SERVICE_SET_TEMPERATURE,
+            {ATTR_ENTITY_ID: entity_ids[i % len(entity_ids)], ATTR_TEMPERATURE: 24 + (i % 4) / 2},
+            blocking=True,
+        )
+        latencies.append(time.monotonic() - started)
+
+    report(
+        "scale",
+        acs=acs,
+        setup_s=setup,
+        requests_per_min=requests_per_refresh * 60 / interval,
+        refresh_avg_s=sum(durations) / len(durations),
+        refresh_max_s=max(durations),
+        command_p50_ms=percentile(latencies, 50) * 1000,
+        command_p99_ms=percentile(latencies, 99) * 1000,
+    )
+    # 共有ポーラーなので、AC台数によらず1回の更新は2リクエスト
+    assert requests_per_refresh == 2
+    await async_unload_all(hass)
+
+
+@pytest.mark.parametrize("acs", [1, 5, 10, 25, 50])
+async def test_memory(hass, start_fake_nature, acs: int) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=acs, other_appliances=acs, signals=10))
+    # 翻訳・プラットフォームの読み込みなど初回だけの確保を済ませてから測る
+    await async_setup_acs(hass, server, 1)
+    await async_unload_all(hass)
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        await hass.config_entries.async_remove(entry.entry_id)
+
+    tracemalloc.start(_FRAMES)
+    await async_setup_acs(hass, server, acs)
+    memory = _integration_memory(tracemalloc.take_snapshot())
+    tracemalloc.stop()
+
+    report("memory", acs=acs, memory_kib=memory / 1024, per_ac_kib=memory / 1024 / acs)
+    await async_unload_all(hass)
@@ -0,0 +1,41 @@
+"""接続の使い回し（keep-alive）あり／なしでの1リクエストあたりのレイテンシ
+
+共有の ClientSession と、リクエストごとに接続を張り直すセッション（=以前の実装と同じ）を比べる。
+擬似サーバーは平文HTTPなので、TLSハンドシェイクの分は含まれない（実際の差はこれより大きい）。
+"""
+from __future__ import annotations
+import time
+
+import aiohttp
+import pytest
+
+from bench import percentile, report
+from fake_nature import FakeAccount
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi
+
+REQUESTS = 200
+
+
+@pytest.mark.parametrize("reuse", [True, False])
+async def test_connection_reuse(start_fake_nature, reuse: bool) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=1))
+    connector = aiohttp.TCPConnector(force_close=not reuse)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        api = NatureRemoApi(session, server.token, base_url=server.url)
+        latencies = []
+        for _ in range(REQUESTS):
+            started = time.monotonic()
+            await api._req("GET", "/devices")
+            latencies.append(time.monotonic() - started)
+
+    report(
+        "session",
+        reuse=reuse,
+        requests=REQUESTS,
+        connections=server.connections(),
+        avg_ms=sum(latencies) / len(latencies) * 1000,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+    )
+    assert server.connections() == (1 if reuse else REQUESTS)
@@ -0,0 +1,63 @@
+"""セットアップ開始からエンティティが使えるようになるまで: 保存済みキャッシュなし／あり
+
+キャッシュなしはクラウドからの初回取得（2本の往復）を待つ。
+キャッシュありは前回の能力表・状態で即座にエンティティを出し、取得は裏で行う。
+"""
+from __future__ import annotations
+from datetime import timedelta
+import time
+
+import pytest
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from bench import report
+from common import DOMAIN, async_setup_acs, climate_entity_id
+from fake_nature import FakeAccount
+
+from custom_components.hass_nature_remo_climate.coordinator import CACHE_SAVE_DELAY
+
+
+@pytest.mark.parametrize("latency", [0.1, 0.5])
+async def test_startup_with_cache(hass, hass_storage, start_fake_nature, unload_entries, latency: float) -> None:
+    server = await start_fake_nature(FakeAccount.generate(acs=1), latency=latency)
+    # プラットフォームの初回読み込みをどちらにも含めないよう、先に一度セットアップして消しておく
+    await async_setup_acs(hass, server, 1)
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+
+    started = time.monotonic()
+    entry = (await async_setup_acs(hass, server, 1))[0]
+    cold_wall = time.monotonic() - started
+    cold = hass.data[DOMAIN][entry.entry_id]
+    assert not cold.restored_from_cache
+
+    # 遅延保存を書き出してから、再読み込み（=HA再起動後のセットアップと同じ経路）
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=CACHE_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.{entry.entry_id}" in hass_storage
+
+    server.reset_counts()
+    started = time.monotonic()
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    warm_wall = time.monotonic() - started
+    warm = hass.data[DOMAIN][entry.entry_id]
+    assert warm.restored_from_cache
+    state = hass.states.get(climate_entity_id(hass, server.account.acs[0]["id"]))
+    assert state is not None and state.state != STATE_UNAVAILABLE
+    # この時点ではまだクラウドの応答を待っていない
+    requests_before_available = server.count()
+    await hass.async_block_till_done()
+
+    report(
+        "startup",
+        latency_s=latency,
+        no_cache_ms=cold.setup_duration * 1000,
+        cache_ms=warm.setup_duration * 1000,
+        no_cache_wall_ms=cold_wall * 1000,
+        cache_wall_ms=warm_wall * 1000,
+        requests_before_available=requests_before_available,
+    )
+    assert warm.setup_duration < latency <= cold.setup_duration
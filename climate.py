@@ -1,19 +1,37 @@
 from __future__ import annotations
-from typing import Any, List
+from dataclasses import replace
+from typing import Any, Sequence
 import logging
 
+import voluptuous as vol
+
 from homeassistant.components.climate import (
+    ATTR_FAN_MODE,
+    ATTR_HVAC_MODE,
+    ATTR_SWING_HORIZONTAL_MODE,
+    ATTR_SWING_MODE,
     ClimateEntity,
     ClimateEntityFeature,
     HVACMode,
 )
 from homeassistant.const import UnitOfTemperature, ATTR_TEMPERATURE
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.core import callback
 
-from .const import DOMAIN, DEFAULT_NAME, CONF_APPLIANCE_ID, CONF_TOKEN
-from .coordinator import RemoCoordinator
-from .api import NatureRemoApi, RemoAuthError, RemoConnectionError
+from .const import (
+    DOMAIN,
+    DEFAULT_NAME,
+    CONF_APPLIANCE_ID,
+    CONF_OPTIMISTIC,
+    EVENT_COMMAND_FAILED,
+    SERVICE_APPLY_STATE,
+    SERVICE_LEARN_SIGNAL,
+)
+from .coordinator import EMPTY_CAPABILITIES, Capabilities, ModeCapabilities, RemoCoordinator
+from .api import RemoAuthError, RemoConnectionError, format_temperature
+from .models import AirconSettings
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,10 +51,34 @@ REMO_TO_HVAC = {
     "dry": HVACMode.DRY,
     "blow": HVACMode.FAN_ONLY,
 }
+# aircon_settings のリクエスト項目 → レスポンス settings の項目
+_REQUEST_TO_SETTINGS = {
+    "operation_mode": "mode",
+    "temperature": "temp",
+    "air_volume": "vol",
+    "air_direction": "dir",
+    "air_direction_h": "dirh",
+    "button": "button",
+}
+# 室温の傾き（℃/時）と、設定温度に届くまでの推定（分）
+ATTR_TEMPERATURE_TREND = "temperature_trend"
+ATTR_TIME_TO_TARGET = "time_to_target"
+_STATE_SCHEMA = {
+    vol.Optional(ATTR_HVAC_MODE): vol.Coerce(HVACMode),
+    vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+    vol.Optional(ATTR_FAN_MODE): cv.string,
+    vol.Optional(ATTR_SWING_MODE): cv.string,
+    vol.Optional(ATTR_SWING_HORIZONTAL_MODE): cv.string,
+}
+
 async def async_setup_entry(hass, entry, async_add_entities):
     coord: RemoCoordinator = hass.data[DOMAIN][entry.entry_id]
     async_add_entities([NatureRemoClimate(coord, entry.data, entry.options)], True)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_APPLY_STATE, _STATE_SCHEMA, "async_apply_state")
+    platform.async_register_entity_service(SERVICE_LEARN_SIGNAL, _STATE_SCHEMA, "async_learn_signal")
+
 class NatureRemoClimate(ClimateEntity):
     _attr_has_entity_name = True
     _attr_name = DEFAULT_NAME
@@ -52,7 +94,8 @@ class NatureRemoClimate(ClimateEntity):
     def __init__(self, coordinator: RemoCoordinator, data: dict, options: dict) -> None:
         self.coordinator = coordinator
         self._attr_unique_id = f"{DOMAIN}-{coordinator.appliance_id}"
-        self._api = NatureRemoApi(data[CONF_TOKEN])
+        # コーディネータと同じAPIクライアント（=同じコネクションプール）を使う
+        self._api = coordinator.api
         self._appliance_id = data[CONF_APPLIANCE_ID]
 
         self._current_hvac_mode = HVACMode.OFF
@@ -62,36 +105,35 @@ class NatureRemoClimate(ClimateEntity):
         self._current_temperature = None
         self._current_target_temperature = None
         self._current_observed_temperature = None
+        self._attr_extra_state_attributes: dict[str, Any] = {
+            ATTR_TEMPERATURE_TREND: None,
+            ATTR_TIME_TO_TARGET: None,
+        }
+        # 直近の設定値
+        self._settings = AirconSettings()
+        self._optimistic: bool = options.get(CONF_OPTIMISTIC, False)
+        self._commands_in_flight = 0
 
         self._update_from_coordinator()
 
-    def _caps(self) -> dict:
-        return self.coordinator.capabilities or {"modes": {}, "order": []}
+    def _caps(self) -> Capabilities:
+        return self.coordinator.capabilities or EMPTY_CAPABILITIES
 
-    def _mode_caps(self, mode: HVACMode) -> dict:
-        return self._caps().get("modes", {}).get(mode.value, {})
+    def _mode_caps(self, mode: HVACMode | None) -> ModeCapabilities:
+        return self._caps().mode(mode)
 
-    def _temp_bounds_for(self, mode: HVACMode) -> tuple[float, float]:
-        temps = self._mode_caps(mode).get("temp_list") or []
-        if temps:
-            if temps != [""]: # FAN_ONLYは空だがHASSの仕様上値を返さないとUIでモード操作時にエラーが出るのでフォールバックさせる
-                return (min(temps), max(temps))
-        # フォールバック（機種が空を返すケース）
-        if mode in (HVACMode.HEAT_COOL, HVACMode.DRY):
-            return (-2.0, 2.0)
-        return (18, 32)
+    def _temp_bounds_for(self, mode: HVACMode | None) -> tuple[float, float]:
+        caps = self._mode_caps(mode)
+        return (caps.temp_min, caps.temp_max)
 
     @property
     def device_info(self) -> DeviceInfo:
-        data = self.coordinator.data or {}
-        model = (data.get("model") or {}).get("name", "AC")
-        manufacturer = (data.get("device") or {}).get("manufacturer", "Nature")
-        name = data.get("nickname", DEFAULT_NAME)
+        snapshot = self.coordinator.data
         return DeviceInfo(
             identifiers={(DOMAIN, self._attr_unique_id)},
-            name=name,
-            manufacturer=manufacturer,
-            model=model,
+            name=(snapshot and snapshot.nickname) or DEFAULT_NAME,
+            manufacturer=(snapshot and snapshot.manufacturer) or "Nature",
+            model=(snapshot and snapshot.model) or "AC",
         )
 
     @property
@@ -110,46 +152,28 @@ class NatureRemoClimate(ClimateEntity):
     def fan_mode(self) -> str | None: return self._current_fan_mode if self._current_hvac_mode != HVACMode.OFF else ""
 
     @property
-    def min_temp(self) -> float: return self._temp_bounds_for(self._current_hvac_mode)[0]
+    def min_temp(self) -> float: return self._mode_caps(self._current_hvac_mode).temp_min
 
     @property
-    def max_temp(self) -> float: return self._temp_bounds_for(self._current_hvac_mode)[1]
+    def max_temp(self) -> float: return self._mode_caps(self._current_hvac_mode).temp_max
 
     @property
     def current_temperature(self) -> float | None: return self._current_observed_temperature
 
     @property
-    def hvac_modes(self) -> List[HVACMode]:
-        result: list[HVACMode] = [HVACMode(k) for k in self._caps().get("order") or [] if k in HVAC_TO_REMO]
-        # 空になった場合のフォールバック
-        if not result:
-            result = [
-                HVACMode.OFF,
-                HVACMode.HEAT,
-                HVACMode.COOL,
-            ]
-        return result
+    def hvac_modes(self) -> Sequence[HVACMode]: return self._caps().hvac_modes
 
     @property
-    def fan_modes(self) -> List[str]:
-        caps = self._mode_caps(self._current_hvac_mode)
-        lst = caps.get("vol_list")
-        return lst or [""]
+    def fan_modes(self) -> Sequence[str]: return self._mode_caps(self._current_hvac_mode).fan_modes
 
     @property
-    def swing_horizontal_modes(self) -> List[str]:
-        caps = self._mode_caps(self._current_hvac_mode)
-        lst = caps.get("dirh_list")
-        return lst or [""]
+    def swing_horizontal_modes(self) -> Sequence[str]: return self._mode_caps(self._current_hvac_mode).swing_horizontal_modes
 
     @property
-    def swing_modes(self) -> List[str]:
-        caps = self._mode_caps(self._current_hvac_mode)
-        lst = caps.get("dir_list")
-        return lst or [""]
+    def swing_modes(self) -> Sequence[str]: return self._mode_caps(self._current_hvac_mode).swing_modes
 
     @property
-    def target_temperature_step(self) -> float: return 0.5
+    def target_temperature_step(self) -> float: return self._mode_caps(self._current_hvac_mode).temp_step
 
     @property
     def available(self) -> bool: return self.coordinator.last_update_success
@@ -158,40 +182,23 @@ class NatureRemoClimate(ClimateEntity):
     def should_poll(self) -> bool: return False
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
-        if hvac_mode not in self.hvac_modes:
+        if hvac_mode not in self._caps().hvac_mode_set:
             return
         target = HVAC_TO_REMO.get(hvac_mode)
         if target is None:
             return
-        try:
-            settings = await self._api.async_set_mode(self._appliance_id, target)
-        except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to set hvac_mode: %s", e)
-            return
-        self._apply_settings(settings)
-        self.async_write_ha_state()
+        data = {"button": "power-off"} if target == "off" else {"operation_mode": target}
+        await self._async_send(data, "hvac_mode")
 
     async def async_set_swing_horizontal_mode(self, swing_horizontal_mode: str) -> None:
-        if swing_horizontal_mode not in self.swing_horizontal_modes:
+        if swing_horizontal_mode not in self._mode_caps(self._current_hvac_mode).swing_horizontal_mode_set:
             return
-        try:
-            settings = await self._api.async_set_swing_horizontal(self._appliance_id, swing_horizontal_mode)
-        except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to set swing_horizontal: %s", e)
-            return
-        self._apply_settings(settings)
-        self.async_write_ha_state()
+        await self._async_send({"air_direction_h": swing_horizontal_mode}, "swing_horizontal")
 
     async def async_set_swing_mode(self, swing_mode: str) -> None:
-        if swing_mode not in self.swing_modes:
-            return
-        try:
-            settings = await self._api.async_set_swing(self._appliance_id, swing_mode)
-        except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to set swing: %s", e)
+        if swing_mode not in self._mode_caps(self._current_hvac_mode).swing_mode_set:
             return
-        self._apply_settings(settings)
-        self.async_write_ha_state()
+        await self._async_send({"air_direction": swing_mode}, "swing")
 
     async def async_set_temperature(self, **kwargs) -> None:
         if (t := kwargs.get(ATTR_TEMPERATURE)) is None:
@@ -207,77 +214,217 @@ class NatureRemoClimate(ClimateEntity):
             v = max(_l, v)
         if _h is not None:
             v = min(_h, v)
-        try:
-            settings = await self._api.async_set_temperature(self._appliance_id, v)
-        except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to set temperature: %s", e)
-            return
-        self._apply_settings(settings)
-        self.async_write_ha_state()
+        await self._async_send({"temperature": format_temperature(v)}, "temperature")
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
-        if fan_mode not in self.fan_modes:
+        if fan_mode not in self._mode_caps(self._current_hvac_mode).fan_mode_set:
             return
-        try:
-            settings = await self._api.async_set_fan(self._appliance_id, fan_mode)
-        except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to set fan: %s", e)
+        await self._async_send({"air_volume": fan_mode}, "fan")
+
+    async def async_apply_state(
+        self,
+        hvac_mode: HVACMode | None = None,
+        temperature: float | None = None,
+        fan_mode: str | None = None,
+        swing_mode: str | None = None,
+        swing_horizontal_mode: str | None = None,
+    ) -> None:
+        """モード・温度・風量・風向をまとめて1回のaircon_settingsで送る
+
+        各値は（現在ではなく）変更後のモードの能力表で検証する。
+        """
+        data = self._validated_settings(hvac_mode, temperature, fan_mode, swing_mode, swing_horizontal_mode)
+        if not data:
             return
-        self._apply_settings(settings)
-        self.async_write_ha_state()
+        await self._async_send(data, "state")
+
+    async def async_learn_signal(
+        self,
+        hvac_mode: HVACMode | None = None,
+        temperature: float | None = None,
+        fan_mode: str | None = None,
+        swing_mode: str | None = None,
+        swing_horizontal_mode: str | None = None,
+    ) -> None:
+        """Remo本体が直前に受信したリモコンの赤外線を、指定の（省略時は現在の）設定値として覚える"""
+        local = self.coordinator.local
+        if local is None:
+            raise ServiceValidationError("Local Remo host is not configured")
+        data = self._validated_settings(hvac_mode, temperature, fan_mode, swing_mode, swing_horizontal_mode)
+        try:
+            await local.async_learn(self._target_settings(data))
+        except (RemoConnectionError, ValueError) as e:
+            raise HomeAssistantError(f"Failed to learn IR signal: {e}") from e
+
+    def _validated_settings(
+        self,
+        hvac_mode: HVACMode | None,
+        temperature: float | None,
+        fan_mode: str | None,
+        swing_mode: str | None,
+        swing_horizontal_mode: str | None,
+    ) -> dict[str, str]:
+        """サービス引数を変更後のモードの能力表で検証し、aircon_settings の送信内容にする"""
+        target = hvac_mode if hvac_mode is not None else self._current_hvac_mode
+        if hvac_mode is not None and hvac_mode not in self._caps().hvac_mode_set:
+            raise ServiceValidationError(f"Unsupported hvac_mode: {hvac_mode}")
+
+        data: dict[str, str] = {}
+        if target == HVACMode.OFF:
+            # 停止中（または停止への変更）には温度・風量・風向を送れない。黙って捨てずにエラーにする
+            extra = [
+                name for name, value in (
+                    (ATTR_TEMPERATURE, temperature),
+                    (ATTR_FAN_MODE, fan_mode),
+                    (ATTR_SWING_MODE, swing_mode),
+                    (ATTR_SWING_HORIZONTAL_MODE, swing_horizontal_mode),
+                ) if value is not None
+            ]
+            if extra:
+                raise ServiceValidationError(
+                    f"Cannot set {', '.join(extra)} with hvac_mode off; specify an operating hvac_mode"
+                )
+            if hvac_mode is not None:
+                data["button"] = "power-off"
+            return data
+
+        if hvac_mode is not None:
+            data["operation_mode"] = HVAC_TO_REMO[hvac_mode]
+        caps = self._mode_caps(target)
+        if temperature is not None:
+            # クランプすると別の意味の値になる（dry/autoは相対値、blowは温度なし）ので範囲外はエラー
+            if not caps.temps:
+                raise ServiceValidationError(f"Temperature cannot be set for {target}")
+            v = round(temperature * 2) / 2
+            if v not in caps.temps:
+                raise ServiceValidationError(
+                    f"Unsupported temperature for {target}: {temperature} "
+                    f"(allowed {format_temperature(caps.temp_min)}..{format_temperature(caps.temp_max)})"
+                )
+            data["temperature"] = format_temperature(v)
+        for value, allowed, field in (
+            (fan_mode, caps.fan_mode_set, "air_volume"),
+            (swing_mode, caps.swing_mode_set, "air_direction"),
+            (swing_horizontal_mode, caps.swing_horizontal_mode_set, "air_direction_h"),
+        ):
+            if value is None:
+                continue
+            if value not in allowed:
+                raise ServiceValidationError(f"Unsupported {field} for {target}: {value}")
+            data[field] = value
+        return data
 
     async def async_turn_off(self) -> None:
+        await self._async_send({"button": "power-off"}, "power off")
+
+    def _target_settings(self, data: dict[str, str]) -> AirconSettings:
+        """現在の設定に送信内容を重ねた、送信後の設定値"""
+        changes = {_REQUEST_TO_SETTINGS[field]: value for field, value in data.items()}
+        if "operation_mode" in data:
+            # モード指定は電源ONを伴う
+            changes["button"] = ""
+        return replace(self._settings, **changes)
+
+    async def _async_send(self, data: dict[str, str], what: str) -> None:
+        """コマンド送信。ローカルに学習済みの赤外線があればLAN経由、無ければ（失敗しても）クラウド経由"""
+        previous = self._settings
+        if self._optimistic:
+            # 楽観的更新: 応答を待たずに反映し、応答（または次回のポーリング）で確定させる
+            self._apply_settings(self._target_settings(data))
+            self.async_write_ha_state()
+
+        self._commands_in_flight += 1
         try:
-            settings = await self._api.async_set_power(self._appliance_id, False)
+            settings = await self._async_send_command(data)
         except (RemoAuthError, RemoConnectionError) as e:
-            _LOGGER.warning("Failed to power off: %s", e)
+            _LOGGER.warning("Failed to set %s: %s", what, e)
+            if self._optimistic:
+                _LOGGER.warning("Rolling back optimistic %s update for %s", what, self.entity_id)
+                self.hass.bus.async_fire(
+                    EVENT_COMMAND_FAILED,
+                    {"entity_id": self.entity_id, "command": what, "data": data, "error": str(e)},
+                )
+                self._apply_settings(previous)
+                self.async_write_ha_state()
             return
-        self._apply_settings(settings)
+        finally:
+            self._commands_in_flight -= 1
+        if settings is not None:
+            self._apply_settings(settings)
         self.async_write_ha_state()
 
+    async def _async_send_command(self, data: dict[str, str]) -> AirconSettings | None:
+        hub = self.coordinator.hub
+        if (local := self.coordinator.local) is not None:
+            target = self._target_settings(data)
+            try:
+                if await local.async_send(target):
+                    hub.async_apply_command_settings(self._appliance_id, target.as_dict(), local=True)
+                    return target
+            except RemoConnectionError as e:
+                _LOGGER.debug("Local send failed, falling back to cloud: %s", e)
+        res = await self._api.async_update_settings(self._appliance_id, data)
+        if not isinstance(res, dict):
+            return None
+        # 応答の settings をそのまま最新のスナップショットとして共有ポーラーへ返す
+        hub.async_apply_command_settings(self._appliance_id, res)
+        return AirconSettings.from_dict(res)
+
     @callback
     def _handle_coordinator_update(self) -> None:
+        # 見た目（状態・属性）が変わったときだけ書き込む。毎回書くと state_changed や
+        # recorder の行、ダッシュボードへのpushが変化なしでも発生する
+        before = self._state_key()
         self._update_from_coordinator()
+        if self._state_key() == before:
+            self.coordinator.state_writes_skipped += 1
+            return
+        self.coordinator.state_writes += 1
         self.async_write_ha_state()
 
+    def _state_key(self) -> tuple:
+        """状態として書き出される値の要約（能力表は変化時に作り直されるので同一性で比べられる）"""
+        return (
+            self.available,
+            self._current_hvac_mode,
+            self._current_target_temperature,
+            self._current_observed_temperature,
+            self._current_fan_mode,
+            self._current_swing_mode,
+            self._current_swing_horizontal_mode,
+            self._caps(),
+            tuple(self._attr_extra_state_attributes.values()),
+        )
+
     async def async_added_to_hass(self) -> None:
         self.async_on_remove(
             self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
     def _update_from_coordinator(self) -> None:
-        data = self.coordinator.data or {}
-        settings = data.get("ac",{}).get("settings") or {}
-        events = data.get("bridge",{}).get("newest_events") or {}
-        self._apply_bridge_events(events)
-        self._apply_settings(settings)
-
-    def _apply_bridge_events(self, events: dict) -> None:
-        temp = events.get("te", {}).get("val")
-        try:
-            self._current_observed_temperature = float(temp) if temp not in (None, "") else None
-        except (TypeError, ValueError):
-            self._current_observed_temperature = None
-
-    def _apply_settings(self, settings: dict) -> None:
-        temp = settings.get("temp")
-        try:
-            self._current_target_temperature = float(temp) if temp not in (None, "") else None
-        except (TypeError, ValueError):
-            self._current_target_temperature = None
+        snapshot = self.coordinator.data
+        if snapshot is None:
+            return
+        self._current_observed_temperature = snapshot.sensors.temperature
+        # 丸めておき、誤差程度の変化では状態を書き込まない
+        trend = self.coordinator.temperature_trend
+        time_to_target = self.coordinator.time_to_target
+        self._attr_extra_state_attributes = {
+            ATTR_TEMPERATURE_TREND: round(trend, 2) if trend is not None else None,
+            ATTR_TIME_TO_TARGET: round(time_to_target / 60) if time_to_target is not None else None,
+        }
+        if self._commands_in_flight:
+            # 送信中のコマンドがある間は、送信前に取得した設定値で上書きしない
+            return
+        self._apply_settings(snapshot.settings)
 
-        mode = (settings.get("mode") or "").lower()
-        button = (settings.get("button") or "").lower()
-        if button == "power-off":
+    def _apply_settings(self, settings: AirconSettings) -> None:
+        self._settings = settings
+        self._current_target_temperature = settings.temperature
+        if settings.power_off:
             self._current_hvac_mode = HVACMode.OFF
         else:
-            self._current_hvac_mode = REMO_TO_HVAC.get(mode)
-
-        vol = (settings.get("vol") or "").lower()
-        self._current_fan_mode = vol
-
-        dirh = (settings.get("dirh") or "").lower()
-        self._current_swing_horizontal_mode = dirh
-
-        dir = (settings.get("dir") or "").lower()
-        self._current_swing_mode = dir
+            self._current_hvac_mode = REMO_TO_HVAC.get(settings.mode)
+        self._current_fan_mode = settings.vol
+        self._current_swing_horizontal_mode = settings.dirh
+        self._current_swing_mode = settings.dir
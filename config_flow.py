@@ -3,16 +3,32 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_NAME
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .const import (
     DOMAIN,
+    CONFIG_FLOW_TIMEOUT,
     DEFAULT_NAME,
     CONF_TOKEN,
     CONF_APPLIANCE_ID,
+    CONF_LOCAL_HOST,
+    CONF_OPTIMISTIC,
+    CONF_POLL_MAX,
+    CONF_POLL_MIN,
+    CONF_POLL_POLICY,
+    CONF_RATE_LIMIT_RESERVE,
+    CONF_RECORD_PATH,
+    DEFAULT_POLL_MAX,
+    DEFAULT_POLL_MIN,
+    DEFAULT_RATE_LIMIT_RESERVE,
+    POLL_POLICY_ADAPTIVE,
+    POLL_POLICY_FIXED,
 )
 from .api import NatureRemoApi, RemoAuthError, RemoConnectionError
+from .coordinator import async_discard_discovery, async_stash_discovery
 
 class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    # 2: unique_id をユーザーIDからアプライアンスIDに変更（1AC=1エントリ）
+    VERSION = 2
 
     def __init__(self) -> None:
         self._token: str | None = None
@@ -22,11 +38,11 @@ class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            # 1) トークン受領→APIでユーザーと家電一覧を取得
+            # 1) トークン受領→APIでユーザーと家電・デバイス一覧を並行に取得
             token = user_input[CONF_TOKEN]
-            api = NatureRemoApi(token)
+            api = NatureRemoApi(async_get_clientsession(self.hass), token)
             try:
-                info = await api.async_get_user_and_appliances()
+                info = await api.async_get_account(timeout=CONFIG_FLOW_TIMEOUT)
             except RemoAuthError:
                 errors["base"] = "auth"
             except RemoConnectionError:
@@ -39,9 +55,8 @@ class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 else:
                     self._token = token
                     self._acs = acs
-                    # 同一ユーザーに対して1エントリを想定
-                    await self.async_set_unique_id(info.get("user_id", "remo-user"))
-                    self._abort_if_unique_id_configured()
+                    # エントリ作成直後の初回ポーリングで同じ取得を繰り返さないよう引き継ぐ
+                    async_stash_discovery(self.hass, token, info["appliances"], info["devices"])
                     return await self.async_step_select()
 
         schema = vol.Schema(
@@ -58,6 +73,9 @@ class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             # 2) 選択を受け取り→エントリ作成
+            # 1AC=1エントリ（同一トークンのACはポーリングを共有する）
+            await self.async_set_unique_id(user_input[CONF_APPLIANCE_ID])
+            self._abort_if_unique_id_configured()
             return self.async_create_entry(
                 title=user_input.get(CONF_NAME, DEFAULT_NAME),
                 data={
@@ -79,15 +97,65 @@ class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
         return self.async_show_form(step_id="select", data_schema=schema)
 
+    @callback
+    def async_remove(self) -> None:
+        # エントリ作成時はセットアップで使われ済み。中断・破棄されたフローの分はここで捨てる
+        if self._token is not None:
+            async_discard_discovery(self.hass, self._token)
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
-        return NatureRemoOptionsFlow(config_entry)
+        return NatureRemoOptionsFlow()
 
 class NatureRemoOptionsFlow(config_entries.OptionsFlow):
-    def __init__(self, config_entry):
-        self.config_entry = config_entry
+    # config_entry はHAが設定する（OptionsFlow.config_entry）
 
     async def async_step_init(self, user_input=None):
-        # オプションなし
-        return self.async_create_entry(title="", data={})
\ No newline at end of file
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if user_input.get(CONF_POLL_MIN, DEFAULT_POLL_MIN) > user_input.get(CONF_POLL_MAX, DEFAULT_POLL_MAX):
+                errors["base"] = "poll_min_gt_max"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        # エラーで出し直すときは入力した値を残す
+        options = {**self.config_entry.options, **(user_input or {})}
+        schema = vol.Schema(
+            {
+                # ユーザー操作（コマンド送信）用に残しておくAPIリクエスト数
+                vol.Optional(
+                    CONF_RATE_LIMIT_RESERVE,
+                    default=options.get(CONF_RATE_LIMIT_RESERVE, DEFAULT_RATE_LIMIT_RESERVE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=30)),
+                # Remo本体のIP/ホスト名（空ならローカル送信しない）
+                vol.Optional(
+                    CONF_LOCAL_HOST,
+                    description={"suggested_value": options.get(CONF_LOCAL_HOST)},
+                ): str,
+                # コマンドの応答を待たずにUIへ反映する
+                vol.Optional(
+                    CONF_OPTIMISTIC,
+                    default=options.get(CONF_OPTIMISTIC, False),
+                ): bool,
+                # ポーリング間隔の決め方と、adaptive時の下限・上限（秒）
+                vol.Optional(
+                    CONF_POLL_POLICY,
+                    default=options.get(CONF_POLL_POLICY, POLL_POLICY_FIXED),
+                ): vol.In([POLL_POLICY_FIXED, POLL_POLICY_ADAPTIVE]),
+                vol.Optional(
+                    CONF_POLL_MIN,
+                    default=options.get(CONF_POLL_MIN, DEFAULT_POLL_MIN),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                vol.Optional(
+                    CONF_POLL_MAX,
+                    default=options.get(CONF_POLL_MAX, DEFAULT_POLL_MAX),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                # APIのリクエスト/レスポンスをJSONLに記録する（トークンはマスク）
+                vol.Optional(
+                    CONF_RECORD_PATH,
+                    description={"suggested_value": options.get(CONF_RECORD_PATH)},
+                ): str,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
\ No newline at end of file
@@ -3,3 +3,47 @@ DEFAULT_NAME = "Nature Remo Climate"
 
 CONF_TOKEN = "token"
 CONF_APPLIANCE_ID = "appliance_id"
+
+SERVICE_APPLY_STATE = "apply_state"
+
+# hass.data[DOMAIN] 内の共有ポーラー（トークン→RemoAccountCoordinator）
+DATA_ACCOUNTS = "accounts"
+# 設定フローで取得したアカウントのデータ（トークン→取得結果）。共有ポーラーの初回取得に引き継ぐ
+DATA_DISCOVERY = "discovery"
+DISCOVERY_TTL = 300  # 秒。これより古ければ捨てて取り直す
+CONFIG_FLOW_TIMEOUT = 20  # 秒
+
+# ポーリング
+DEFAULT_SCAN_INTERVAL = 60  # 秒
+REQUESTS_PER_POLL = 2  # /appliances + /devices
+COMMAND_CONFIRM_DELAY = 5  # コマンド後の確認ポーリングまでの秒数
+
+# 状態に応じたポーリング間隔（fixed: 常にDEFAULT_SCAN_INTERVAL / adaptive: 停止中は長く、収束中は短く）
+CONF_POLL_POLICY = "poll_policy"
+POLL_POLICY_FIXED = "fixed"
+POLL_POLICY_ADAPTIVE = "adaptive"
+CONF_POLL_MIN = "poll_min"
+CONF_POLL_MAX = "poll_max"
+DEFAULT_POLL_MIN = 30  # 秒
+DEFAULT_POLL_MAX = 600  # 秒
+
+# レート制限: ユーザー操作のために残しておくリクエスト数
+CONF_RATE_LIMIT_RESERVE = "rate_limit_reserve"
+DEFAULT_RATE_LIMIT_RESERVE = 10
+
+# HAストレージ（能力表＋直近スナップショットのキャッシュ）
+STORAGE_VERSION = 1
+
+# LAN内のRemo本体（設定するとキャッシュ済みの赤外線フレームをローカルで送る）
+CONF_LOCAL_HOST = "local_host"
+SERVICE_LEARN_SIGNAL = "learn_signal"
+
+# 楽観的更新: コマンドの応答を待たずに状態へ反映する（失敗時は元に戻してイベントを発火）
+CONF_OPTIMISTIC = "optimistic"
+EVENT_COMMAND_FAILED = f"{DOMAIN}_command_failed"
+
+# APIトラフィックの記録先（configディレクトリからの相対パス。空なら記録しない）
+CONF_RECORD_PATH = "record_path"
+
+# Remo本体・スマートメーターのセンサーを出すエントリが外れたときの通知
+SIGNAL_CLAIMS_RELEASED = f"{DOMAIN}_claims_released"
@@ -1,16 +1,51 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple
+import asyncio
+import hashlib
 import logging
-from copy import deepcopy
+import time
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.components.climate import HVACMode
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, CONF_TOKEN, CONF_APPLIANCE_ID
+from .const import (
+    DOMAIN,
+    COMMAND_CONFIRM_DELAY,
+    CONF_APPLIANCE_ID,
+    CONF_LOCAL_HOST,
+    CONF_POLL_MAX,
+    CONF_POLL_MIN,
+    CONF_POLL_POLICY,
+    CONF_RATE_LIMIT_RESERVE,
+    CONF_RECORD_PATH,
+    CONF_TOKEN,
+    DATA_ACCOUNTS,
+    DATA_DISCOVERY,
+    DEFAULT_POLL_MAX,
+    DEFAULT_POLL_MIN,
+    DEFAULT_RATE_LIMIT_RESERVE,
+    DEFAULT_SCAN_INTERVAL,
+    DISCOVERY_TTL,
+    POLL_POLICY_ADAPTIVE,
+    POLL_POLICY_FIXED,
+    REQUESTS_PER_POLL,
+    SIGNAL_CLAIMS_RELEASED,
+    STORAGE_VERSION,
+)
 from .api import NatureRemoApi, RemoAuthError, RemoConnectionError
+from .history import TemperatureHistory
+from .local import RemoLocalController
+from .models import SMART_METER_TYPE, ApplianceSnapshot, SmartMeterReading
+from .transport import AiohttpTransport, RecordingTransport, RemoTransport
 
 _LOGGER = logging.getLogger(__name__)
 _mode_sort = [
@@ -25,108 +60,788 @@ def _mode_sort_key(_x):
     _m = HVACMode(_x)
     return _mode_sort.index(_m) if _m in _mode_sort else 99999999
 
-def _build_capabilities(ac: dict) -> Dict[str, Any]:
+# Remo表記 → HA表記
+_MAP_MODE = {
+    "auto": HVACMode.HEAT_COOL,
+    "warm": HVACMode.HEAT,
+    "heat": HVACMode.HEAT,
+    "cool": HVACMode.COOL,
+    "dry": HVACMode.DRY,
+    "blow": HVACMode.FAN_ONLY,
+}
+_EMPTY: tuple[str, ...] = ("",)
+# キャッシュ保存の遅延（秒）。ポーリングのたびに書き込まないようにまとめる
+CACHE_SAVE_DELAY = 30
+# 設定温度が絶対値のモード（室温との差で収束中かを判断できる）
+_ABSOLUTE_TEMP_MODES = ("cool", "warm", "heat")
+# 室温と設定温度がこれ以上離れていれば「収束途中」とみなす（℃）
+CONVERGING_DELTA = 1.0
+_DEFAULT_TEMP_STEP = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class ModeCapabilities:
+    """1モード分の能力表（構築後は不変。プロパティ読み出しは属性参照と in だけで済む）"""
+
+    temps: tuple[float, ...]      # 例：(-2,-1.5,...,2) / (18,18.5,...,32) / ()
+    temp_min: float
+    temp_max: float
+    temp_step: float
+    fan_modes: tuple[str, ...]    # 例：("1","2","3","4","5","auto") / ("",)
+    swing_modes: tuple[str, ...]  # 例：("1","2","3","4","5","auto","swing")
+    swing_horizontal_modes: tuple[str, ...]  # 例：("1","2","3","swing")
+    fan_mode_set: frozenset[str]
+    swing_mode_set: frozenset[str]
+    swing_horizontal_mode_set: frozenset[str]
+
+    @classmethod
+    def build(
+        cls,
+        mode: HVACMode,
+        temps: tuple[float, ...] = (),
+        fan_modes: tuple[str, ...] = (),
+        swing_modes: tuple[str, ...] = (),
+        swing_horizontal_modes: tuple[str, ...] = (),
+    ) -> ModeCapabilities:
+        if temps:
+            temp_min, temp_max = temps[0], temps[-1]
+            steps = [b - a for a, b in zip(temps, temps[1:]) if b > a]
+            temp_step = min(steps) if steps else _DEFAULT_TEMP_STEP
+        elif mode in (HVACMode.HEAT_COOL, HVACMode.DRY):
+            # フォールバック（機種が空を返すケース）。FAN_ONLYは空だがHASSの仕様上値を返さないと
+            # UIでモード操作時にエラーが出るのでフォールバックさせる
+            temp_min, temp_max, temp_step = -2.0, 2.0, _DEFAULT_TEMP_STEP
+        else:
+            temp_min, temp_max, temp_step = 18.0, 32.0, _DEFAULT_TEMP_STEP
+        fan_modes = fan_modes or _EMPTY
+        swing_modes = swing_modes or _EMPTY
+        swing_horizontal_modes = swing_horizontal_modes or _EMPTY
+        return cls(
+            temps=temps,
+            temp_min=temp_min,
+            temp_max=temp_max,
+            temp_step=temp_step,
+            fan_modes=fan_modes,
+            swing_modes=swing_modes,
+            swing_horizontal_modes=swing_horizontal_modes,
+            fan_mode_set=frozenset(fan_modes),
+            swing_mode_set=frozenset(swing_modes),
+            swing_horizontal_mode_set=frozenset(swing_horizontal_modes),
+        )
+
+
+# 能力表に無いモードを参照されたときの値（モードごとに温度範囲のフォールバックが異なる）
+_FALLBACK_MODES: Mapping[HVACMode, ModeCapabilities] = MappingProxyType(
+    {m: ModeCapabilities.build(m) for m in HVACMode}
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Capabilities:
+    """AC全体の能力表（不変）"""
+
+    hvac_modes: tuple[HVACMode, ...]
+    hvac_mode_set: frozenset[HVACMode]
+    modes: Mapping[HVACMode, ModeCapabilities]
+
+    def mode(self, mode: HVACMode | None) -> ModeCapabilities:
+        caps = self.modes.get(mode)
+        if caps is None:
+            caps = _FALLBACK_MODES.get(mode) or _FALLBACK_MODES[HVACMode.OFF]
+        return caps
+
+
+# 能力表が未取得のときの値
+EMPTY_CAPABILITIES = Capabilities(
+    hvac_modes=(HVACMode.OFF, HVACMode.HEAT, HVACMode.COOL),
+    hvac_mode_set=frozenset((HVACMode.OFF, HVACMode.HEAT, HVACMode.COOL)),
+    modes=MappingProxyType({}),
+)
+
+
+def _parse_temps(temps_str: List[str]) -> tuple[float, ...]:
+    # 温度: 文字列配列（""含む）→ 昇順のfloatタプル（""のみなら空）
+    temps: List[float] = []
+    for s in temps_str:
+        if s is None or s == "":
+            continue
+        try:
+            temps.append(float(s))
+        except (TypeError, ValueError):
+            pass
+    return tuple(sorted(set(temps)))
+
+
+def _build_capabilities(ac: dict) -> Capabilities:
     """ /appliances の1ACから能力表を抽出し、HA用に正規化 """
     modes = (((ac.get("aircon") or {}).get("range") or {}).get("modes") or {})
-    # Remo表記 → HA表記
-    map_mode = {
-        "auto":HVACMode.HEAT_COOL.value,
-        "warm":HVACMode.HEAT.value,
-        "heat":HVACMode.HEAT.value,
-        "cool":HVACMode.COOL.value,
-        "dry":HVACMode.DRY.value,
-        "blow":HVACMode.FAN_ONLY.value
-    }
-    caps: Dict[str, Any] = {"modes": {}, "order": []}
-
-    caps["order"].append(HVACMode.OFF.value)
-    caps["modes"]["off"] = {
-        "temp_list": [""],
-        "vol_list": [""],
-        "dirh_list": [""],
-        "dir_list": [""],
+
+    built: Dict[HVACMode, ModeCapabilities] = {
+        HVACMode.OFF: _FALLBACK_MODES[HVACMode.OFF],
     }
     for k_remo, body in modes.items():
-        ha_mode = map_mode.get(k_remo)
+        ha_mode = _MAP_MODE.get(k_remo)
         if not ha_mode:
             continue
-        caps["order"].append(ha_mode)
-        # 温度: 文字列配列（""含む）→ float配列（または""）
-        temps_str: List[str] = body.get("temp") or []
-        temps: List[float|str] = []
-        for s in temps_str:
-            try:
-                if s is None: 
-                    continue
-                if s == "":
-                    temps.append(s)
-                else:
-                    temps.append(float(s))
-            except Exception:
-                pass
-        temps.sort()
-        vol = body.get("vol") or []
-        dirh_v = body.get("dirh") or []
-        dir_v = body.get("dir") or []
-
-        caps["modes"][ha_mode] = {
-            "temp_list": temps,          # 例：[-2,-1.5,...,2] / [18,18.5,...,32] / [""]
-            "vol_list": vol,             # 例：["1","2","3","4","5","auto"] / [""] etc.
-            "dirh_list": dirh_v,      # 例：["1","2","3","swing"]
-            "dir_list": dir_v,      # 例：["1","2","3","4","5","auto","swing"]
+        built[ha_mode] = ModeCapabilities.build(
+            ha_mode,
+            temps=_parse_temps(body.get("temp") or []),
+            fan_modes=tuple(body.get("vol") or ()),
+            swing_modes=tuple(body.get("dir") or ()),
+            swing_horizontal_modes=tuple(body.get("dirh") or ()),
+        )
+    order = tuple(sorted(built, key=_mode_sort_key))
+    return Capabilities(
+        hvac_modes=order,
+        hvac_mode_set=frozenset(order),
+        modes=MappingProxyType(built),
+    )
+
+
+class RefreshStats:
+    """共有ポーラーの更新回数・失敗回数・所要時間"""
+
+    __slots__ = ("count", "failures", "last_duration", "total_duration", "max_duration")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.failures = 0
+        self.last_duration: float | None = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def record(self, duration: float, success: bool) -> None:
+        self.count += 1
+        if not success:
+            self.failures += 1
+        self.last_duration = duration
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+            "avg_duration": self.total_duration / self.count if self.count else None,
+            "max_duration": self.max_duration,
         }
-    caps['order'].sort(key=_mode_sort_key)
-    return caps
 
 
-class RemoCoordinator(DataUpdateCoordinator[dict | None]):
-    """/appliances を叩いて指定ACの最新スナップショット＋能力表（メモリ保持のみ）"""
+def _pick(src: dict | None, keys: tuple[str, ...]) -> dict:
+    src = src or {}
+    return {k: src[k] for k in keys if k in src}
+
+
+def _slim_appliance(a: dict) -> dict:
+    """/appliances の1要素から、このインテグレーションが使う項目だけを取り出す"""
+    return {
+        "id": a["id"],
+        "type": a.get("type"),
+        "nickname": a.get("nickname"),
+        "model": _pick(a.get("model"), ("name", "manufacturer")),
+        "device": _pick(a.get("device"), ("id", "name")),
+        "settings": a.get("settings") or {},
+        "aircon": {"range": ((a.get("aircon") or {}).get("range"))},
+    }
+
+
+def _slim_device(d: dict) -> dict:
+    """/devices の1要素から、このインテグレーションが使う項目だけを取り出す"""
+    return _pick(d, ("id", "name", "firmware_version", "serial_number", "newest_events"))
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+
+class _CommandSettings(NamedTuple):
+    sent_at: float
+    settings: dict
+    local: bool
+    cloud_updated_at: str | None
+
+
+class RemoAccountCoordinator(DataUpdateCoordinator[dict]):
+    """同一トークン（アカウント）の /appliances + /devices を1サイクル1回だけ取得する共有ポーラー
+
+    ACごとのエントリ（RemoCoordinator）はこのスナップショットから自分の分を切り出す。
+    ACが増えてもリクエスト数は一定。
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        token: str,
+        record_path: str | None = None,
+        transport: RemoTransport | None = None,
+    ) -> None:
+        """transport を渡すとクラウドの代わりにそれを使う（記録の再生 ReplayTransport など）"""
+        self.hass = hass
+        # HA共有のClientSessionを使い、コネクションプールを使い回す（closeはHA側が行う）
+        session = async_get_clientsession(hass)
+        if record_path:
+            # 実トラフィックをJSONLに記録する（オフラインでの再生・比較用）
+            transport = RecordingTransport(transport or AiohttpTransport(session), hass.config.path(record_path))
+            _LOGGER.info("Recording Nature Remo API traffic to %s", hass.config.path(record_path))
+        self.api = NatureRemoApi(session, token, transport=transport)
+        self.token = token
+        # アカウント単位のエンティティ・デバイスの識別子（トークンそのものは出さない）
+        self.account_id = hashlib.sha256(token.encode()).hexdigest()[:12]
+        self._members: Dict[str, ConfigEntry] = {}
+        self._first_refresh_lock = asyncio.Lock()
+        # 直近の取得時間（秒）: {"appliances":..., "devices":..., "total":...}
+        self.last_fetch_timing: Dict[str, float] = {}
+        self.refresh_stats = RefreshStats()
+        # ACごとの直近のコマンド応答（古いポーリング結果で巻き戻さないため）
+        self._command_settings: Dict[str, _CommandSettings] = {}
+        self._unsub_confirm: CALLBACK_TYPE | None = None
+        self._children: Dict[str, RemoCoordinator] = {}
+        # Remo本体・スマートメーターのID → そのセンサーを出しているエントリ（複数のACで重複させない）
+        self._claims: Dict[str, str] = {}
+        # 設定フローが取得したばかりのアカウントデータ（async_ensure_data の取得でだけ使う）
+        self._discovery: _Discovery | None = None
+        super().__init__(
+            hass,
+            _LOGGER,
+            # 複数エントリで共有するので特定のエントリには紐付けない
+            config_entry=None,
+            name=f"{DOMAIN}-account",
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+        )
+
+    @property
+    def members(self) -> Dict[str, ConfigEntry]:
+        return self._members
+
+    @property
+    def appliance_ids(self) -> set[str]:
+        return {e.data[CONF_APPLIANCE_ID] for e in self._members.values()}
+
+    @property
+    def rate_limit_reserve(self) -> int:
+        """参加エントリのうち最も大きい予約数（=最も保守的な設定）を採用"""
+        return max(
+            (e.options.get(CONF_RATE_LIMIT_RESERVE, DEFAULT_RATE_LIMIT_RESERVE) for e in self._members.values()),
+            default=DEFAULT_RATE_LIMIT_RESERVE,
+        )
+
+    @callback
+    def async_register_child(self, child: RemoCoordinator) -> None:
+        self._children[child.entry.entry_id] = child
+
+    @callback
+    def async_unregister_child(self, child: RemoCoordinator) -> None:
+        self._children.pop(child.entry.entry_id, None)
+        self.async_release_claims(child.entry.entry_id)
+
+    @callback
+    def async_claim(self, device_id: str, entry_id: str) -> bool:
+        """アカウント共有のデバイスのセンサーを出す役を先着1エントリに割り当てる。割り当てられたらTrue"""
+        return self._claims.setdefault(device_id, entry_id) == entry_id
+
+    @callback
+    def async_release_claims(self, entry_id: str) -> None:
+        """エントリが持っていた割り当てを手放し、残りのエントリに引き継がせる"""
+        released = [d for d, owner in self._claims.items() if owner == entry_id]
+        for device_id in released:
+            del self._claims[device_id]
+        if released:
+            async_dispatcher_send(self.hass, SIGNAL_CLAIMS_RELEASED)
+
+    def _state_interval(self, account: dict | None) -> float:
+        """各ACの状態から求めた希望間隔のうち最短のもの"""
+        if account is None or not self._children:
+            return float(DEFAULT_SCAN_INTERVAL)
+        return min(child.desired_poll_interval(account) for child in self._children.values())
+
+    def _update_poll_interval(self, account: dict | None) -> None:
+        interval = timedelta(seconds=self._rate_limited_interval(self._state_interval(account)))
+        if interval != self.update_interval:
+            _LOGGER.debug(
+                "Poll interval -> %s (rate limit: %s, reserve=%d, breaker: %s)",
+                interval, self.api.rate_limit.as_dict(), self.rate_limit_reserve, self.api.breaker.state,
+            )
+            self.update_interval = interval
+
+    def _rate_limited_interval(self, base: float) -> float:
+        """X-Rate-Limit-* から、予約分を残してリセットまで持つポーリング間隔（秒）を求める
+
+        base（状態から決めた希望間隔）より短くはしない。
+        """
+        interval = base
+        rl = self.api.rate_limit
+        now = time.time()
+        until_reset = rl.seconds_until_reset(now)
+        if rl.remaining is not None and until_reset is not None:
+            polls_left = (rl.remaining - self.rate_limit_reserve) / REQUESTS_PER_POLL
+            if polls_left < 1:
+                # 予約分しか残っていない→リセットまで待つ
+                interval = max(interval, until_reset + 1)
+            else:
+                interval = max(interval, until_reset / polls_left)
+        if rl.retry_at is not None and rl.retry_at > now:
+            # 429のRetry-Afterは必ず守る
+            interval = max(interval, rl.retry_at - now)
+        retry_in = self.api.breaker.retry_in()
+        if retry_in > 0:
+            # クラウドが落ちている間はブレーカーが閉じる（half-openになる）まで待つ
+            interval = max(interval, retry_in + 1)
+        return interval
+
+    def has_appliance(self, appliance_id: str) -> bool:
+        """スナップショットにそのACが含まれているか（取得時に参加中のACだけに絞っているため）"""
+        return self.data is not None and appliance_id in self.data["appliances"]
+
+    async def async_ensure_data(self) -> None:
+        """まだ取得していない（または新しく参加したACが含まれていない）なら取得する
+
+        複数エントリの同時セットアップでも1回だけ。
+        """
+        async with self._first_refresh_lock:
+            if not all(self.has_appliance(a) for a in self.appliance_ids):
+                # エントリ作成直後なら、設定フローで取得したデータを今回の分として使える
+                self._discovery = _pop_discovery(self.hass, self.token)
+                try:
+                    await self.async_refresh()
+                finally:
+                    self._discovery = None
+
+    async def _async_update_data(self) -> dict:
+        data = None
+        started = time.monotonic()
+        try:
+            data = await self._async_fetch()
+            return data
+        finally:
+            self.refresh_stats.record(time.monotonic() - started, data is not None)
+            if data is not None:
+                # 室温が変わったかは新しく取得できたときだけ判定する（失敗時・コマンド反映時は前回の判定のまま）
+                for child in self._children.values():
+                    child.sample_poll_state(data)
+            # 成否にかかわらず、ACの状態と最新のレート制限状態から次回までの間隔を決める
+            self._update_poll_interval(data if data is not None else self.data)
+
+    async def _async_fetch(self) -> dict:
+        # 2本は独立しているので並行に投げ、遅い方の往復時間だけで済ませる
+        started = time.monotonic()
+        discovered, self._discovery = self._discovery, None
+        if discovered is not None and self.appliance_ids <= {a.get("id") for a in discovered.appliances}:
+            # 設定フローで取得したばかりのデータで足りれば同じ取得を繰り返さない。
+            # コマンド応答との新旧比較には、実際に取得した時刻を使う
+            _LOGGER.debug("Using account data fetched by the config flow %.1f s ago", started - discovered.fetched_at)
+            return self._build_account(discovered.appliances, discovered.devices, discovered.fetched_at)
+        (apps, t_apps), (devs, t_devs) = await self._gather_mapped(
+            self._timed_req("/appliances"),
+            self._timed_req("/devices"),
+        )
+        self.last_fetch_timing = {
+            "appliances": t_apps,
+            "devices": t_devs,
+            "total": time.monotonic() - started,
+        }
+        _LOGGER.debug(
+            "Fetched /appliances (%.3f s) + /devices (%.3f s) in %.3f s (sequential would be ~%.3f s)",
+            t_apps, t_devs, self.last_fetch_timing["total"], t_apps + t_devs,
+        )
+        return self._build_account(apps, devs, started)
+
+    def _build_account(self, apps: list, devs: list, started: float) -> dict:
+        # 必要なACと、その親デバイスの使う項目だけを残す（他の家電や signals などは捨てる）
+        wanted = self.appliance_ids
+        appliances = {a["id"]: _slim_appliance(a) for a in apps if a.get("id") in wanted}
+        bridge_ids = {(a.get("device") or {}).get("id") for a in appliances.values()}
+        devices = {d["id"]: _slim_device(d) for d in devs if d.get("id") in bridge_ids}
+        # 同じ /appliances に載っているスマートメーターは、瞬時電力・積算電力量だけ取り出しておく
+        smart_meters = {
+            a["id"]: SmartMeterReading.from_raw(a)
+            for a in apps
+            if a.get("type") == SMART_METER_TYPE and a.get("id")
+        }
+        self._overlay_command_settings(appliances, started)
+        return {
+            "appliances": appliances,
+            "devices": devices,
+            "smart_meters": smart_meters,
+        }
+
+    @callback
+    def async_apply_command_settings(self, appliance_id: str, settings: dict, local: bool = False) -> None:
+        """コマンド応答の settings を部分スナップショットとして反映し、ポーリングのタイマーをリセットする
+
+        local=True（LAN経由で送った）の場合、クラウドはその変更を知らないので、
+        クラウド側の settings が変わるまでこちらの値を優先し続ける。
+        """
+        if self.data is None or appliance_id not in self.data["appliances"]:
+            return
+        ac = self.data["appliances"][appliance_id]
+        if ac.get("settings") is settings:
+            # まとめて送ったPOSTの応答は待ち手全員に同じ dict が返る。反映・配信はバッチにつき1回だけ
+            return
+        cloud_updated_at = (ac.get("settings") or {}).get("updated_at") if local else None
+        self._command_settings[appliance_id] = _CommandSettings(time.monotonic(), settings, local, cloud_updated_at)
+
+        appliances = dict(self.data["appliances"])
+        appliances[appliance_id] = {**ac, "settings": settings}
+        new_data = {**self.data, "appliances": appliances}
+        self._update_poll_interval(new_data)
+        # async_set_updated_data が次回ポーリングのタイマーもリセットする
+        self.async_set_updated_data(new_data)
+
+        if not local:
+            # クラウドへの反映を確かめるため、少し後に1回だけ取得する
+            if self._unsub_confirm is not None:
+                self._unsub_confirm()
+            self._unsub_confirm = async_call_later(self.hass, COMMAND_CONFIRM_DELAY, self._async_confirm_command)
+
+    async def _async_confirm_command(self, _now: Any) -> None:
+        self._unsub_confirm = None
+        await self.async_refresh()
+
+    def _overlay_command_settings(self, appliances: dict, fetch_started: float) -> None:
+        """取得開始より後に送ったコマンドの settings を、古いクラウド値で巻き戻さない"""
+        for appliance_id, cmd in list(self._command_settings.items()):
+            ac = appliances.get(appliance_id)
+            if ac is None:
+                del self._command_settings[appliance_id]
+                continue
+            cloud = ac.get("settings") or {}
+            if cmd.sent_at > fetch_started:
+                pass
+            elif cmd.local and cloud.get("updated_at") == cmd.cloud_updated_at:
+                pass
+            else:
+                # クラウドが追いついた（または別の操作で変わった）
+                del self._command_settings[appliance_id]
+                continue
+            ac["settings"] = cmd.settings
+
+    async def async_shutdown(self) -> None:
+        if self._unsub_confirm is not None:
+            self._unsub_confirm()
+            self._unsub_confirm = None
+        await super().async_shutdown()
+
+    async def _timed_req(self, path: str) -> tuple[Any, float]:
+        started = time.monotonic()
+        res = await self.api._req("GET", path)
+        return res, time.monotonic() - started
+
+    @staticmethod
+    async def _gather_mapped(*aws) -> list:
+        """並行実行して、失敗は従来通り UpdateFailed に変換（認証エラーを優先）"""
+        results = await asyncio.gather(*aws, return_exceptions=True)
+        for r in results:
+            if isinstance(r, RemoAuthError):
+                raise UpdateFailed("Unauthorized token") from r
+        for r in results:
+            if isinstance(r, RemoConnectionError):
+                raise UpdateFailed(f"Connection error: {r}") from r
+            if isinstance(r, BaseException):
+                raise r
+        return results
+
+
+class _Discovery(NamedTuple):
+    fetched_at: float
+    appliances: list
+    devices: list
+
+
+@callback
+def async_stash_discovery(hass: HomeAssistant, token: str, appliances: list, devices: list) -> None:
+    """設定フローで取得した /appliances・/devices を、共有ポーラーの次の取得に引き継ぐ"""
+    stash: Dict[str, _Discovery] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_DISCOVERY, {})
+    now = time.monotonic()
+    # 使われなかった古いものは捨てる
+    for key in [k for k, d in stash.items() if now - d.fetched_at > DISCOVERY_TTL]:
+        del stash[key]
+    stash[token] = _Discovery(now, appliances, devices)
+
+
+@callback
+def async_discard_discovery(hass: HomeAssistant, token: str) -> None:
+    """設定フローが中断・破棄されたとき、使われなかったデータを捨てる"""
+    hass.data.get(DOMAIN, {}).get(DATA_DISCOVERY, {}).pop(token, None)
+
+
+def _pop_discovery(hass: HomeAssistant, token: str) -> _Discovery | None:
+    discovered = hass.data.get(DOMAIN, {}).get(DATA_DISCOVERY, {}).pop(token, None)
+    if discovered is None or time.monotonic() - discovered.fetched_at > DISCOVERY_TTL:
+        return None
+    return discovered
+
+
+@callback
+def async_join_account(hass: HomeAssistant, entry: ConfigEntry) -> RemoAccountCoordinator:
+    """トークンに対応する共有ポーラーを取得（なければ作成）し、エントリを参加させる"""
+    token = entry.data[CONF_TOKEN]
+    hubs: Dict[str, RemoAccountCoordinator] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_ACCOUNTS, {})
+    hub = hubs.get(token)
+    if hub is None:
+        hub = hubs[token] = RemoAccountCoordinator(hass, token, entry.options.get(CONF_RECORD_PATH))
+    hub.members[entry.entry_id] = entry
+    return hub
+
+
+async def async_leave_account(hass: HomeAssistant, hub: RemoAccountCoordinator, entry_id: str) -> None:
+    """エントリを共有ポーラーから外し、誰もいなくなったら停止・破棄する"""
+    hub.members.pop(entry_id, None)
+    if hub.members:
+        return
+    hass.data.get(DOMAIN, {}).get(DATA_ACCOUNTS, {}).pop(hub.token, None)
+    await hub.async_shutdown()
+
+
+def _to_float(v: Any) -> float | None:
+    try:
+        return float(v) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _cache_store(hass: HomeAssistant, entry_id: str) -> Store[dict]:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+async def async_remove_cache(hass: HomeAssistant, entry_id: str) -> None:
+    await _cache_store(hass, entry_id).async_remove()
+
+
+class RemoCoordinator(DataUpdateCoordinator[ApplianceSnapshot]):
+    """共有ポーラーのスナップショットから指定ACの分を切り出す＋能力表
+
+    自身はポーリングせず、RemoAccountCoordinator の更新を受けて配信する。
+    能力表と直近のスナップショットはHAストレージにも保存し、起動時はそこから即座に復元する。
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, hub: RemoAccountCoordinator) -> None:
         self.hass = hass
         self.entry = entry
-        self.api = NatureRemoApi(entry.data[CONF_TOKEN])
+        self.hub = hub
+        self.api = hub.api
         self.appliance_id = entry.data[CONF_APPLIANCE_ID]
-        self._capabilities: Dict[str, Any] | None = None
+        self._capabilities: Capabilities | None = None
+        # 能力表の元になった range サブドキュメント（変化がなければ能力表を再構築しない）
+        self._caps_source: Any = None
+        self._caps_changed = False
+        self.capability_rebuilds = 0
+        # エンティティが状態を書き込んだ回数／見た目が変わらず書き込みを省いた回数
+        self.state_writes = 0
+        self.state_writes_skipped = 0
+        # 直前の取得時の室温と、その次の取得で室温が変わらなかったか（adaptiveポーリング用）
+        self._poll_prev_observed: float | None = None
+        self._poll_temp_stable = False
+        # 室温の計測ごとの履歴（傾き・設定温度到達までの推定に使う）
+        self.history = TemperatureHistory()
+        # 直近の更新で設定値/センサー値が実際に変わったか（下流の処理を省くため）
+        self.settings_changed = True
+        self.sensors_changed = True
+        self._unsub_hub: CALLBACK_TYPE | None = None
+        self._store = _cache_store(hass, entry.entry_id)
+        # 遅延保存待ちのキャッシュ（アンロード時に書き出す）
+        self._pending_cache: dict | None = None
+        # LAN内のRemo本体へ直接送る経路（オプションでホストが設定されている場合のみ）
+        local_host = (entry.options.get(CONF_LOCAL_HOST) or "").strip()
+        self.local = RemoLocalController(hass, entry.entry_id, local_host) if local_host else None
+        # キャッシュから復元したか / セットアップ開始→エンティティ利用可能までの時間（秒）
+        self.restored_from_cache = False
+        self.setup_duration: float | None = None
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}-coordinator",
-            update_interval=timedelta(seconds=60),
+            update_interval=None,
         )
 
     @property
-    def capabilities(self) -> Dict[str, Any] | None:
+    def capabilities(self) -> Capabilities | None:
         return self._capabilities
 
-    async def _async_update_data(self) -> dict | None:
+    async def async_load_cache(self) -> bool:
+        """保存済みのスナップショットを読み込む。使えるものがあれば True"""
+        cached = await self._store.async_load()
+        if not cached:
+            return False
         try:
-            apps = await self.api._req("GET", "/appliances")
-        except RemoAuthError as e:
-            raise UpdateFailed("Unauthorized token") from e
-        except RemoConnectionError as e:
-            raise UpdateFailed(f"Connection error: {e}") from e
+            data = self._apply(cached["ac"], cached["bridge"])
+        except (KeyError, TypeError, UpdateFailed) as e:
+            _LOGGER.debug("Ignoring unusable cache: %s", e)
+            return False
+        self.data = data
+        self.restored_from_cache = True
+        return True
 
-        apps_ac = next((a for a in apps if a.get("id") == self.appliance_id), None)
-        if not apps_ac:
-            raise UpdateFailed("Appliance not found")
+    @callback
+    def async_start_background_refresh(self) -> None:
+        """キャッシュで起動した後の初回取得（セットアップはブロックしない）"""
+        if self.hub.has_appliance(self.appliance_id):
+            # 同じトークンの他のACが、このACを含めて取得済み
+            self._handle_hub_update()
+            return
+        # 未取得、または稼働中の共有ポーラーに新しく参加した（スナップショットにまだこのACがない）
+        self.entry.async_create_background_task(
+            self.hass, self.hub.async_ensure_data(), f"{DOMAIN}-first-refresh"
+        )
 
-        # 毎回、能力表を構築して差分があれば更新（=再起動時は当然取り直す）
-        new_caps = _build_capabilities(apps_ac)
-        if self._capabilities != new_caps:
-            self._capabilities = deepcopy(new_caps)
-            _LOGGER.debug("Capabilities updated (in-memory): %s", self._capabilities)
+    @callback
+    def async_attach(self) -> None:
+        """共有ポーラーの購読を開始（=ポーリング対象に参加）"""
+        if self._unsub_hub is None:
+            self.hub.async_register_child(self)
+            self._unsub_hub = self.hub.async_add_listener(self._handle_hub_update)
 
-        dev_id = apps_ac["device"]["id"]
+    @callback
+    def async_detach(self) -> None:
+        self.hub.async_unregister_child(self)
+        if self._unsub_hub is not None:
+            self._unsub_hub()
+            self._unsub_hub = None
+
+    def _observed_temperature(self, account: dict) -> float | None:
+        ac = account["appliances"].get(self.appliance_id) or {}
+        bridge = account["devices"].get((ac.get("device") or {}).get("id")) or {}
+        return _to_float(((bridge.get("newest_events") or {}).get("te") or {}).get("val"))
+
+    def sample_poll_state(self, account: dict) -> None:
+        """共有ポーラーが新しく取得したデータで、前回の取得から室温が変わったかを記録する"""
+        observed = self._observed_temperature(account)
+        self._poll_temp_stable = observed is not None and observed == self._poll_prev_observed
+        self._poll_prev_observed = observed
+
+    def desired_poll_interval(self, account: dict) -> float:
+        """このACの状態から見た希望ポーリング間隔（秒）。副作用なし
+
+        adaptive: 停止中で室温も変わっていなければ長く、運転中で室温が設定温度から
+        離れている（=収束途中）なら短くする。
+        """
+        options = self.entry.options
+        if options.get(CONF_POLL_POLICY, POLL_POLICY_FIXED) != POLL_POLICY_ADAPTIVE:
+            return float(DEFAULT_SCAN_INTERVAL)
+        poll_min = float(options.get(CONF_POLL_MIN, DEFAULT_POLL_MIN))
+        poll_max = float(max(poll_min, options.get(CONF_POLL_MAX, DEFAULT_POLL_MAX)))
+        base = min(max(float(DEFAULT_SCAN_INTERVAL), poll_min), poll_max)
+
+        ac = account["appliances"].get(self.appliance_id)
+        if not ac:
+            return base
+        settings = ac.get("settings") or {}
+        observed = self._observed_temperature(account)
+
+        if settings.get("button") == "power-off":
+            return poll_max if self._poll_temp_stable else base
+        target = _to_float(settings.get("temp"))
+        # auto/dry の設定温度は相対値（±2℃）なので室温とは比べない
+        if (
+            settings.get("mode") in _ABSOLUTE_TEMP_MODES
+            and observed is not None
+            and target is not None
+            and abs(observed - target) >= CONVERGING_DELTA
+        ):
+            return poll_min
+        return base
+
+    @callback
+    def _handle_hub_update(self) -> None:
+        if not self.hub.last_update_success:
+            self.async_set_update_error(self.hub.last_exception or UpdateFailed("Account update failed"))
+            return
         try:
-            devs = await self.api._req("GET", "/devices")
-        except RemoAuthError as e:
-            raise UpdateFailed("Unauthorized token") from e
-        except RemoConnectionError as e:
-            raise UpdateFailed(f"Connection error: {e}") from e
+            data = self._slice(self.hub.data)
+        except UpdateFailed as e:
+            self.async_set_update_error(e)
+            return
+        self.async_set_updated_data(data)
 
-        devs_brdg = next((d for d in devs if d.get("id") == dev_id), None)
+    async def _async_update_data(self) -> ApplianceSnapshot:
+        await self.hub.async_ensure_data()
+        if not self.hub.last_update_success or self.hub.data is None:
+            raise UpdateFailed(f"Account update failed: {self.hub.last_exception}")
+        return self._slice(self.hub.data)
+
+    def _slice(self, account: dict) -> ApplianceSnapshot:
+        apps_ac = account["appliances"].get(self.appliance_id)
+        if not apps_ac:
+            raise UpdateFailed("Appliance not found")
+
+        dev_id = apps_ac["device"]["id"]
+        devs_brdg = account["devices"].get(dev_id)
         if not devs_brdg:
             raise UpdateFailed("Bridge Device not found")
 
-        return {"ac": apps_ac, "bridge":devs_brdg}
+        data = self._apply(apps_ac, devs_brdg)
+        if self.settings_changed or self.sensors_changed or self._caps_changed:
+            # 保存するのは共有ポーラーが持つ（必要項目だけに絞った）生データ
+            self._pending_cache = {"ac": apps_ac, "bridge": devs_brdg}
+            self._store.async_delay_save(self._cache_to_save, CACHE_SAVE_DELAY)
+        return data
+
+    def _cache_to_save(self) -> dict | None:
+        data, self._pending_cache = self._pending_cache, None
+        return data
+
+    async def async_shutdown(self) -> None:
+        """遅延保存を今すぐ書き出して打ち切る
+
+        残しておくと、エントリ削除でファイルを消した後にこの Store が書き戻してしまう。
+        """
+        if self._pending_cache is not None:
+            await self._store.async_save(self._cache_to_save())
+        if self.local is not None:
+            await self.local.async_shutdown()
+        await super().async_shutdown()
+
+    def _apply(self, apps_ac: dict, devs_brdg: dict) -> ApplianceSnapshot:
+        # range が前回と同じなら能力表はそのまま使う（=再起動時は当然取り直す）
+        caps_source = (apps_ac.get("aircon") or {}).get("range")
+        self._caps_changed = self._capabilities is None or caps_source != self._caps_source
+        if self._caps_changed:
+            self._capabilities = _build_capabilities(apps_ac)
+            self._caps_source = caps_source
+            self.capability_rebuilds += 1
+            _LOGGER.debug("Capabilities updated: %s", self._capabilities)
+
+        snapshot = ApplianceSnapshot.from_raw(apps_ac, devs_brdg)
+        previous = self.data
+        self.settings_changed = previous is None or snapshot.settings != previous.settings
+        self.sensors_changed = previous is None or snapshot.sensors != previous.sensors
+        self._record_history(snapshot)
+        return snapshot
+
+    def _record_history(self, snapshot: ApplianceSnapshot) -> None:
+        # 室温の計測時刻で1サンプル。ポーリングやコマンド応答で同じ計測値を重ねて入れない
+        measured_at = snapshot.sensors.temperature_at
+        if measured_at is None:
+            return
+        ts = measured_at.timestamp()
+        last = self.history.last_timestamp
+        if last is not None and ts <= last:
+            return
+        settings = snapshot.settings
+        self.history.append(
+            ts,
+            snapshot.sensors.temperature,
+            settings.temperature,
+            self._history_mode(settings),
+        )
+
+    @staticmethod
+    def _history_mode(settings) -> str:
+        return "off" if settings.power_off else settings.mode
+
+    @property
+    def temperature_trend(self) -> float | None:
+        """今のモード・設定温度になってからの室温の傾き（℃/時）"""
+        snapshot = self.data
+        if snapshot is None or not self.history.is_current(
+            snapshot.settings.temperature, self._history_mode(snapshot.settings)
+        ):
+            return None
+        slope = self.history.slope()
+        return slope * 3600 if slope is not None else None
+
+    @property
+    def time_to_target(self) -> float | None:
+        """冷房・暖房中に、今の傾きのまま設定温度に届くまでの推定秒数"""
+        snapshot = self.data
+        if snapshot is None or snapshot.settings.power_off or snapshot.settings.mode not in _ABSOLUTE_TEMP_MODES:
+            return None
+        return self.history.time_to_target(
+            snapshot.sensors.temperature, snapshot.settings.temperature, self._history_mode(snapshot.settings)
+        )
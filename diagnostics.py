@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_TOKEN
+from .coordinator import RemoCoordinator
+
+TO_REDACT = {CONF_TOKEN}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    coord: RemoCoordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coord.hub
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "setup": {
+            "duration": coord.setup_duration,
+            "restored_from_cache": coord.restored_from_cache,
+        },
+        "coordinator": {
+            "capability_rebuilds": coord.capability_rebuilds,
+            "state_writes": coord.state_writes,
+            "state_writes_skipped": coord.state_writes_skipped,
+            "last_update_success": coord.last_update_success,
+        },
+        "account": {
+            "members": len(hub.members),
+            "poll_interval": hub.update_interval.total_seconds() if hub.update_interval else None,
+            "rate_limit": hub.api.rate_limit.as_dict(),
+            "rate_limit_reserve": hub.rate_limit_reserve,
+            "circuit_breaker": hub.api.breaker.as_dict(),
+            "last_fetch_timing": hub.last_fetch_timing,
+            "refresh": hub.refresh_stats.as_dict(),
+            "requests": hub.api.stats.as_dict(),
+        },
+    }
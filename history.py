@@ -0,0 +1,157 @@
+from __future__ import annotations
+from array import array
+import math
+
+_NAN = float("nan")
+# モード列に入れる番号（array('b') に収めるため文字列ではなく添字で持つ）
+MODES = ("", "off", "auto", "cool", "warm", "heat", "dry", "blow")
+_MODE_INDEX = {m: i for i, m in enumerate(MODES)}
+DEFAULT_HISTORY_SIZE = 64
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+class TemperatureHistory:
+    """(時刻, 室温, 設定温度, モード) の固定長リングバッファ
+
+    列ごとに array で持つので、サンプルごとに dict やタプルを作らない。
+    室温の傾きは最小二乗法の和（Σt, Σy, Σt², Σty）を追加・追い出しのたびに差分で更新する。
+    和はモードか設定温度が変わった時点で取り直す（=傾きは今の運転条件になってからの区間だけで求める）。
+    時刻は基準時刻からの相対秒で持ち、大きな値どうしの引き算による桁落ちを避ける。
+    """
+
+    __slots__ = (
+        "capacity", "_t", "_observed", "_target", "_mode", "_head", "_len", "_seg_len",
+        "_origin", "_since_rebase", "_n", "_st", "_sy", "_stt", "_sty",
+    )
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE) -> None:
+        self.capacity = capacity
+        self._t = array("d", [0.0]) * capacity
+        self._observed = array("d", [_NAN]) * capacity
+        self._target = array("d", [_NAN]) * capacity
+        self._mode = array("b", [0]) * capacity
+        self._head = 0   # 次に書き込む位置（満杯なら最古のサンプルの位置でもある）
+        self._len = 0
+        self._seg_len = 0  # 末尾から数えた、今のモード・設定温度のサンプル数
+        self._origin: float | None = None
+        self._since_rebase = 0
+        # 室温が入っているサンプルについての回帰の和
+        self._n = 0
+        self._st = self._sy = self._stt = self._sty = 0.0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def last_timestamp(self) -> float | None:
+        """最新サンプルの時刻（epoch秒）"""
+        if not self._len:
+            return None
+        return self._origin + self._t[self._last_index()]
+
+    def _last_index(self) -> int:
+        return (self._head - 1) % self.capacity
+
+    def is_current(self, target: float | None, mode: str) -> bool:
+        """最新サンプルがこのモード・設定温度のものか"""
+        if not self._len:
+            return False
+        i = self._last_index()
+        return self._mode[i] == _MODE_INDEX.get(mode, 0) and _same(
+            self._target[i], target if target is not None else _NAN
+        )
+
+    def append(self, ts: float, observed: float | None, target: float | None, mode: str) -> None:
+        if self._origin is None:
+            self._origin = ts
+        if self._len and not self.is_current(target, mode):
+            # 運転条件が変わったら、それまでの傾きは使わない
+            self._reset_segment()
+        if self._len == self.capacity:
+            if self._seg_len == self._len:
+                self._remove(self._head)
+                self._seg_len -= 1
+        else:
+            self._len += 1
+        i = self._head
+        t = ts - self._origin
+        y = observed if observed is not None else _NAN
+        self._t[i] = t
+        self._observed[i] = y
+        self._target[i] = target if target is not None else _NAN
+        self._mode[i] = _MODE_INDEX.get(mode, 0)
+        self._add(t, y)
+        self._seg_len += 1
+        self._head = (i + 1) % self.capacity
+        self._since_rebase += 1
+        if self._since_rebase >= self.capacity:
+            self._rebase()
+
+    def _add(self, t: float, y: float) -> None:
+        if math.isnan(y):
+            return
+        self._n += 1
+        self._st += t
+        self._sy += y
+        self._stt += t * t
+        self._sty += t * y
+
+    def _remove(self, i: int) -> None:
+        t, y = self._t[i], self._observed[i]
+        if math.isnan(y):
+            return
+        self._n -= 1
+        self._st -= t
+        self._sy -= y
+        self._stt -= t * t
+        self._sty -= t * y
+
+    def _reset_segment(self) -> None:
+        self._seg_len = 0
+        self._n = 0
+        self._st = self._sy = self._stt = self._sty = 0.0
+
+    def _rebase(self) -> None:
+        """基準時刻を最古のサンプルへ移し、和を取り直す（容量ぶんの追加ごとに1回=償却O(1)）"""
+        start = (self._head - self._len) % self.capacity
+        shift = self._t[start]
+        self._origin += shift
+        for k in range(self._len):
+            self._t[(start + k) % self.capacity] -= shift
+        seg_len = self._seg_len
+        self._reset_segment()
+        for k in range(self._len - seg_len, self._len):
+            i = (start + k) % self.capacity
+            self._add(self._t[i], self._observed[i])
+        self._seg_len = seg_len
+        self._since_rebase = 0
+
+    def slope(self) -> float | None:
+        """今の運転条件になってからの室温の傾き（℃/秒）
+
+        室温のあるサンプルが2つ未満、または時刻が揃っていればNone。
+        """
+        if self._n < 2:
+            return None
+        denom = self._n * self._stt - self._st * self._st
+        if denom <= 1e-9 * self._n * self._stt:
+            return None
+        return (self._n * self._sty - self._st * self._sy) / denom
+
+    def time_to_target(self, observed: float | None, target: float | None, mode: str) -> float | None:
+        """今の傾きのまま室温が設定温度に届くまでの推定秒数
+
+        近づいていない、または最新サンプルがまだ今のモード・設定温度のものでなければNone。
+        """
+        if observed is None or target is None or not self.is_current(target, mode):
+            return None
+        if observed == target:
+            return 0.0
+        slope = self.slope()
+        if not slope:
+            return None
+        seconds = (target - observed) / slope
+        return seconds if seconds > 0 else None
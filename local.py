@@ -0,0 +1,76 @@
+from __future__ import annotations
+from typing import Any, Dict
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION
+from .api import NatureRemoLocalApi
+from .models import AirconSettings
+
+_LOGGER = logging.getLogger(__name__)
+
+# キャッシュのキーになる設定値（AirconSettings の属性名）
+SIGNAL_KEY_FIELDS = ("button", "mode", "temp", "vol", "dir", "dirh")
+_SAVE_DELAY = 5
+
+
+def signal_key(settings: AirconSettings) -> str:
+    """設定値タプルをキャッシュのキーにする"""
+    return "|".join(getattr(settings, f) for f in SIGNAL_KEY_FIELDS)
+
+
+def _signal_store(hass: HomeAssistant, entry_id: str) -> Store[dict]:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.signals")
+
+
+async def async_remove_signals(hass: HomeAssistant, entry_id: str) -> None:
+    await _signal_store(hass, entry_id).async_remove()
+
+
+class RemoLocalController:
+    """学習済みの赤外線フレームをRemo本体へLAN経由で直接送る
+
+    フレームは設定値タプルごとにキャッシュし（O(1)で引ける）、HAストレージに保存する。
+    キャッシュに無い設定はクラウド経由で送る。
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, host: str) -> None:
+        self.api = NatureRemoLocalApi(async_get_clientsession(hass), host)
+        self.host = host
+        self._store = _signal_store(hass, entry_id)
+        self._signals: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        self._signals = dict((stored or {}).get("signals") or {})
+
+    async def async_send(self, settings: AirconSettings) -> bool:
+        """キャッシュにあればローカルで送信して True。無ければ何もせず False"""
+        message = self._signals.get(signal_key(settings))
+        if message is None:
+            return False
+        await self.api.async_send_message(message)
+        return True
+
+    async def async_learn(self, settings: AirconSettings) -> None:
+        """Remo本体が直前に受信したフレームを、この設定値のフレームとして覚える"""
+        message = await self.api.async_get_last_message()
+        if not isinstance(message, dict) or not message.get("data"):
+            raise ValueError("No IR signal has been received by the Remo")
+        self._signals[signal_key(settings)] = message
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, _SAVE_DELAY)
+        _LOGGER.debug("Learned local IR signal for %s", signal_key(settings))
+
+    async def async_shutdown(self) -> None:
+        """遅延保存を今すぐ書き出して打ち切る（エントリ削除後に書き戻さないように）"""
+        if self._dirty:
+            await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        self._dirty = False
+        return {"signals": self._signals}
@@ -0,0 +1,184 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+
+def _str(v: Any) -> str:
+    return str(v).lower() if v not in (None, "") else ""
+
+
+def _float(v: Any) -> float | None:
+    try:
+        return float(v) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class AirconSettings:
+    """/appliances の settings、または /aircon_settings の応答（Remo表記のまま）"""
+
+    temp: str = ""
+    mode: str = ""
+    vol: str = ""
+    dir: str = ""
+    dirh: str = ""
+    button: str = ""
+    updated_at: str | None = None
+
+    @classmethod
+    def from_dict(cls, d: dict | None) -> AirconSettings:
+        d = d or {}
+        return cls(
+            temp=str(d.get("temp") or ""),
+            mode=_str(d.get("mode")),
+            vol=_str(d.get("vol")),
+            dir=_str(d.get("dir")),
+            dirh=_str(d.get("dirh")),
+            button=_str(d.get("button")),
+            updated_at=d.get("updated_at"),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def power_off(self) -> bool:
+        return self.button == "power-off"
+
+    @property
+    def temperature(self) -> float | None:
+        return _float(self.temp)
+
+
+@dataclass(frozen=True, slots=True)
+class SensorReadings:
+    """Remo本体の newest_events（te: 温度, hu: 湿度, il: 照度, mo: 人感）"""
+
+    temperature: float | None = None
+    humidity: float | None = None
+    illuminance: float | None = None
+    temperature_at: datetime | None = None
+    humidity_at: datetime | None = None
+    illuminance_at: datetime | None = None
+    motion_at: datetime | None = None
+
+    @classmethod
+    def from_events(cls, events: dict | None) -> SensorReadings:
+        events = events or {}
+
+        def val(key: str) -> float | None:
+            return _float((events.get(key) or {}).get("val"))
+
+        def at(key: str) -> datetime | None:
+            created = (events.get(key) or {}).get("created_at")
+            return dt_util.parse_datetime(created) if isinstance(created, str) else None
+
+        return cls(
+            temperature=val("te"),
+            humidity=val("hu"),
+            illuminance=val("il"),
+            temperature_at=at("te"),
+            humidity_at=at("hu"),
+            illuminance_at=at("il"),
+            motion_at=at("mo"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ApplianceSnapshot:
+    """1AC分の最新状態。ポーリングごとに生JSONから1回だけ組み立て、元のJSONは保持しない"""
+
+    appliance_id: str
+    nickname: str | None
+    model: str | None
+    manufacturer: str | None
+    bridge_id: str
+    bridge_name: str | None
+    bridge_firmware: str | None
+    settings: AirconSettings
+    sensors: SensorReadings
+
+    @classmethod
+    def from_raw(cls, ac: dict, bridge: dict) -> ApplianceSnapshot:
+        model = ac.get("model") or {}
+        return cls(
+            appliance_id=ac["id"],
+            nickname=ac.get("nickname"),
+            model=model.get("name"),
+            manufacturer=model.get("manufacturer"),
+            bridge_id=bridge["id"],
+            bridge_name=bridge.get("name"),
+            bridge_firmware=bridge.get("firmware_version"),
+            settings=AirconSettings.from_dict(ac.get("settings")),
+            sensors=SensorReadings.from_events(bridge.get("newest_events")),
+        )
+
+
+# /appliances の type。ECHONET Lite の低圧スマート電力量メータ
+SMART_METER_TYPE = "EL_SMART_METER"
+
+# 使うEPC（プロパティコード）
+_EPC_COEFFICIENT = 0xD3       # 係数（無ければ1）
+_EPC_CUMULATIVE_ENERGY = 0xE0  # 積算電力量計測値（正方向）
+_EPC_ENERGY_UNIT = 0xE1       # 積算電力量単位（下表のコード）
+_EPC_INSTANT_POWER = 0xE7     # 瞬時電力計測値（W、符号付き）
+_ENERGY_UNITS = {
+    0x00: 1.0,
+    0x01: 0.1,
+    0x02: 0.01,
+    0x03: 0.001,
+    0x04: 0.0001,
+    0x0A: 10.0,
+    0x0B: 100.0,
+    0x0C: 1000.0,
+    0x0D: 10000.0,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SmartMeterReading:
+    """スマートメーターの echonetlite_properties を復号した値"""
+
+    meter_id: str
+    nickname: str | None
+    power: float | None = None    # W
+    energy: float | None = None   # kWh
+    power_at: datetime | None = None
+    energy_at: datetime | None = None
+
+    @classmethod
+    def from_raw(cls, appliance: dict) -> SmartMeterReading:
+        props: dict[int, dict] = {}
+        for p in (appliance.get("smart_meter") or {}).get("echonetlite_properties") or ():
+            try:
+                props[int(p["epc"])] = p
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        def val(epc: int) -> float | None:
+            return _float((props.get(epc) or {}).get("val"))
+
+        def at(epc: int) -> datetime | None:
+            updated = (props.get(epc) or {}).get("updated_at")
+            return dt_util.parse_datetime(updated) if isinstance(updated, str) else None
+
+        # 積算電力量[kWh] = 計測値 × 係数 × 単位
+        energy = None
+        cumulative, unit = val(_EPC_CUMULATIVE_ENERGY), val(_EPC_ENERGY_UNIT)
+        multiplier = _ENERGY_UNITS.get(int(unit)) if unit is not None else None
+        if cumulative is not None and multiplier is not None:
+            coefficient = val(_EPC_COEFFICIENT)
+            energy = cumulative * (coefficient if coefficient is not None else 1.0) * multiplier
+
+        return cls(
+            meter_id=appliance["id"],
+            nickname=appliance.get("nickname"),
+            power=val(_EPC_INSTANT_POWER),
+            energy=energy,
+            power_at=at(_EPC_INSTANT_POWER),
+            energy_at=at(_EPC_CUMULATIVE_ENERGY),
+        )
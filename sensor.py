@@ -0,0 +1,325 @@
+from __future__ import annotations
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    LIGHT_LUX,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfPower,
+    UnitOfTime,
+)
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN, SIGNAL_CLAIMS_RELEASED
+from .coordinator import RemoCoordinator
+from .models import SensorReadings, SmartMeterReading
+
+
+@dataclass(frozen=True, kw_only=True)
+class RemoSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[RemoCoordinator], Any]
+
+
+@dataclass(frozen=True, kw_only=True)
+class RemoMeterSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[SmartMeterReading], Any]
+
+
+# 計測用（診断）センサー。共有ポーラー（アカウント）単位の値なので、アカウントにつき1組だけ出す。
+# 既定では無効で、必要なときだけ有効化する
+DIAGNOSTIC_SENSORS: tuple[RemoSensorEntityDescription, ...] = (
+    RemoSensorEntityDescription(
+        key="api_requests",
+        name="API requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.hub.api.stats.total_requests,
+    ),
+    RemoSensorEntityDescription(
+        key="api_errors",
+        name="API errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.hub.api.stats.total_errors,
+    ),
+    RemoSensorEntityDescription(
+        key="api_bytes_received",
+        name="API bytes received",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.hub.api.stats.bytes_received,
+    ),
+    RemoSensorEntityDescription(
+        key="refresh_duration",
+        name="Refresh duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda c: c.hub.refresh_stats.last_duration,
+    ),
+    RemoSensorEntityDescription(
+        key="rate_limit_remaining",
+        name="Rate limit remaining",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda c: c.hub.api.rate_limit.remaining,
+    ),
+    RemoSensorEntityDescription(
+        key="poll_interval",
+        name="Poll interval",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda c: c.hub.update_interval.total_seconds() if c.hub.update_interval else None,
+    ),
+)
+
+
+def _readings(c: RemoCoordinator) -> SensorReadings:
+    return c.data.sensors if c.data is not None else SensorReadings()
+
+
+# Remo本体のセンサー。ACのスナップショットに含まれる newest_events をそのまま出す（追加のAPI呼び出しなし）
+BRIDGE_SENSORS: tuple[RemoSensorEntityDescription, ...] = (
+    RemoSensorEntityDescription(
+        key="humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda c: _readings(c).humidity,
+    ),
+    RemoSensorEntityDescription(
+        key="illuminance",
+        device_class=SensorDeviceClass.ILLUMINANCE,
+        native_unit_of_measurement=LIGHT_LUX,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda c: _readings(c).illuminance,
+    ),
+    RemoSensorEntityDescription(
+        key="motion",
+        name="Last motion",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda c: _readings(c).motion_at,
+    ),
+)
+
+# スマートメーター。/appliances に一緒に載ってくる echonetlite_properties から出す（追加のAPI呼び出しなし）
+METER_SENSORS: tuple[RemoMeterSensorEntityDescription, ...] = (
+    RemoMeterSensorEntityDescription(
+        key="power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m.power,
+    ),
+    RemoMeterSensorEntityDescription(
+        key="energy",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        value_fn=lambda m: m.energy,
+    ),
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    coord: RemoCoordinator = hass.data[DOMAIN][entry.entry_id]
+    _async_remove_per_entry_diagnostics(hass, coord)
+
+    added: set[str] = set()
+
+    @callback
+    def _async_add_account_sensors() -> None:
+        # アカウント全体の計測値は、同じトークンのACがいくつあっても先着1エントリだけが出す
+        key = f"account-{coord.hub.account_id}"
+        if key in added or not coord.hub.async_claim(key, entry.entry_id):
+            return
+        added.add(key)
+        async_add_entities(RemoDiagnosticSensor(coord, d) for d in DIAGNOSTIC_SENSORS)
+
+    @callback
+    def _async_add_bridge_sensors() -> None:
+        # 同じRemo本体を共有するACが複数あっても、センサーは先着1エントリだけが出す
+        if coord.data is None or not coord.hub.async_claim(coord.data.bridge_id, entry.entry_id):
+            return
+        if coord.data.bridge_id in added:
+            return
+        added.add(coord.data.bridge_id)
+        async_add_entities(RemoBridgeSensor(coord, d) for d in BRIDGE_SENSORS)
+
+    @callback
+    def _async_add_meter_sensors() -> None:
+        # スマートメーターはアカウント共有なので、どのACのエントリが出すかは先着で決める
+        meters = (coord.hub.data or {}).get("smart_meters") or {}
+        for meter_id in meters:
+            if meter_id in added or not coord.hub.async_claim(meter_id, entry.entry_id):
+                continue
+            added.add(meter_id)
+            async_add_entities(RemoSmartMeterSensor(coord, meter_id, d) for d in METER_SENSORS)
+
+    @callback
+    def _async_add_claimed() -> None:
+        _async_add_account_sensors()
+        _async_add_bridge_sensors()
+        _async_add_meter_sensors()
+
+    _async_add_claimed()
+    # 担当していたエントリが外れたら引き継ぐ
+    entry.async_on_unload(async_dispatcher_connect(hass, SIGNAL_CLAIMS_RELEASED, _async_add_claimed))
+    # キャッシュから起動した場合など、メーターは共有ポーラーの初回取得後に見つかる
+    entry.async_on_unload(coord.hub.async_add_listener(_async_add_meter_sensors))
+
+
+@callback
+def _async_remove_per_entry_diagnostics(hass, coord: RemoCoordinator) -> None:
+    """以前はACごとに出していた計測用センサーを登録から消す（アカウント単位に移した）"""
+    registry = er.async_get(hass)
+    for d in DIAGNOSTIC_SENSORS:
+        entity_id = registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}-{coord.appliance_id}-{d.key}")
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+
+
+class RemoDiagnosticSensor(SensorEntity):
+    """共有ポーラーの計測値。デバイスはアカウント"""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = False
+    entity_description: RemoSensorEntityDescription
+
+    def __init__(self, coordinator: RemoCoordinator, description: RemoSensorEntityDescription) -> None:
+        self.coordinator = coordinator
+        self.entity_description = description
+        account_id = coordinator.hub.account_id
+        self._attr_unique_id = f"{DOMAIN}-account-{account_id}-{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"account-{account_id}")},
+            name="Nature Remo account",
+            manufacturer="Nature",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        # 値はすべて共有ポーラーのものなので、その更新（成功・失敗とも）で書き込む
+        self.async_on_remove(
+            self.coordinator.hub.async_add_listener(self._handle_coordinator_update)
+        )
+
+
+class RemoBridgeSensor(SensorEntity):
+    """Remo本体（ブリッジ）のセンサー。デバイスはACではなくRemo本体"""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    entity_description: RemoSensorEntityDescription
+
+    def __init__(self, coordinator: RemoCoordinator, description: RemoSensorEntityDescription) -> None:
+        self.coordinator = coordinator
+        self.entity_description = description
+        snapshot = coordinator.data
+        self._attr_unique_id = f"{DOMAIN}-{snapshot.bridge_id}-{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, snapshot.bridge_id)},
+            name=snapshot.bridge_name or "Nature Remo",
+            manufacturer="Nature",
+            sw_version=snapshot.bridge_firmware,
+        )
+        self._last: tuple | None = None
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_update_success
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # 値も可用性も変わっていなければ書き込まない
+        key = (self.available, self.native_value)
+        if key == self._last:
+            return
+        self._last = key
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        self._last = (self.available, self.native_value)
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
+
+class RemoSmartMeterSensor(SensorEntity):
+    """スマートメーター（EL_SMART_METER）の瞬時電力・積算電力量"""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    entity_description: RemoMeterSensorEntityDescription
+
+    def __init__(
+        self, coordinator: RemoCoordinator, meter_id: str, description: RemoMeterSensorEntityDescription
+    ) -> None:
+        self.coordinator = coordinator
+        self.entity_description = description
+        self._meter_id = meter_id
+        self._attr_unique_id = f"{DOMAIN}-{meter_id}-{description.key}"
+        meter = self._meter()
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, meter_id)},
+            name=(meter and meter.nickname) or "Smart meter",
+            manufacturer="Nature",
+            model="Smart meter",
+        )
+        self._last: tuple | None = None
+
+    def _meter(self) -> SmartMeterReading | None:
+        return ((self.coordinator.hub.data or {}).get("smart_meters") or {}).get(self._meter_id)
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.hub.last_update_success and self._meter() is not None
+
+    @property
+    def native_value(self) -> Any:
+        meter = self._meter()
+        return self.entity_description.value_fn(meter) if meter is not None else None
+
+    @callback
+    def _handle_hub_update(self) -> None:
+        # 値も可用性も変わっていなければ書き込まない
+        key = (self.available, self.native_value)
+        if key == self._last:
+            return
+        self._last = key
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        self._last = (self.available, self.native_value)
+        self.async_on_remove(
+            self.coordinator.hub.async_add_listener(self._handle_hub_update)
+        )
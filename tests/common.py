@@ -0,0 +1,95 @@
+"""テストとベンチマークで共有するヘルパーとフィクスチャ（各 conftest から読み込む）"""
+from __future__ import annotations
+from pathlib import Path
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parents[1]
+DOMAIN = "hass_nature_remo_climate"
+
+
+def install_custom_component() -> None:
+    """リポジトリ直下（=インテグレーション本体）を custom_components.<DOMAIN> として読み込めるようにする"""
+    if any((Path(p) / "custom_components" / DOMAIN).exists() for p in sys.path if p):
+        return
+    base = Path(tempfile.mkdtemp(prefix="remo-tests-"))
+    (base / "custom_components").mkdir()
+    (base / "custom_components" / DOMAIN).symlink_to(ROOT, target_is_directory=True)
+    sys.path.insert(0, str(base))
+
+
+install_custom_component()
+
+import aiohttp  # noqa: E402
+import pytest  # noqa: E402
+from homeassistant.config_entries import ConfigEntryState  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi  # noqa: E402
+from custom_components.hass_nature_remo_climate.const import CONF_APPLIANCE_ID, CONF_TOKEN  # noqa: E402
+
+from fake_nature import FakeNatureServer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture
+async def unload_entries(hass):
+    yield
+    await async_unload_all(hass)
+
+
+@pytest.fixture
+async def session():
+    """HA を介さずに NatureRemoApi を直接動かすときのセッション"""
+    async with aiohttp.ClientSession() as s:
+        yield s
+
+
+def make_api(session: aiohttp.ClientSession, server: FakeNatureServer, **kwargs) -> NatureRemoApi:
+    """擬似サーバーに向けた NatureRemoApi（再試行の待ち時間は既定で0）"""
+    kwargs.setdefault("backoff", 0)
+    return NatureRemoApi(session, server.token, base_url=server.url, **kwargs)
+
+
+def climate_entity_id(hass: HomeAssistant, appliance_id: str) -> str:
+    entity_id = er.async_get(hass).async_get_entity_id("climate", DOMAIN, f"{DOMAIN}-{appliance_id}")
+    assert entity_id is not None
+    return entity_id
+
+
+async def async_setup_acs(
+    hass: HomeAssistant, server: FakeNatureServer, count: int, options: dict | None = None
+) -> list[MockConfigEntry]:
+    """擬似サーバーのACを count 台ぶんエントリとして追加し、セットアップする"""
+    entries = []
+    for ac in server.account.acs[:count]:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            title=ac["nickname"],
+            unique_id=ac["id"],
+            data={CONF_TOKEN: server.token, CONF_APPLIANCE_ID: ac["id"]},
+            options=options or {},
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    # インテグレーションが未読み込みなら1つ目のセットアップで残りのエントリも続けてセットアップされる
+    for entry in entries:
+        if entry.state is ConfigEntryState.NOT_LOADED:
+            assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert all(entry.state is ConfigEntryState.LOADED for entry in entries)
+    return entries
+
+
+async def async_unload_all(hass: HomeAssistant) -> None:
+    """共有ポーラーの確認ポーリング等のタイマーを残さないよう、全エントリをアンロードする"""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,35 @@
+"""pytest-homeassistant-custom-component の hass フィクスチャと擬似 Nature サーバーを使う"""
+from __future__ import annotations
+
+import pytest
+
+from common import auto_enable_custom_integrations, session, unload_entries  # noqa: F401
+from fake_nature import FakeAccount, FakeNatureServer
+from fake_remo_lan import FakeRemoLanServer
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi
+
+
+@pytest.fixture
+def account() -> FakeAccount:
+    """擬似サーバーのアカウント。規模を変えたいテストはこのフィクスチャを上書きする"""
+    return FakeAccount.generate(acs=2)
+
+
+@pytest.fixture
+async def fake_nature(account: FakeAccount, monkeypatch, socket_enabled):
+    # pytest-homeassistant-custom-component はソケットを塞ぐので、このテストの間だけ開ける
+    server = FakeNatureServer(account)
+    await server.start()
+    # 共有ポーラー・設定フローが作る NatureRemoApi をすべて擬似サーバーへ向ける
+    monkeypatch.setattr(NatureRemoApi, "BASE", server.url)
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def fake_remo_lan(socket_enabled):
+    server = FakeRemoLanServer()
+    await server.start()
+    yield server
+    await server.close()
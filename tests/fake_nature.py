@@ -0,0 +1,341 @@
+"""Nature Remo クラウドAPIの擬似サーバー（aiohttp.web）
+
+/users/me, /appliances, /devices, /appliances/{id}/aircon_settings を実装する。
+応答の遅延、X-Rate-Limit-* ヘッダ（固定ウィンドウ）、401/429/5xx・遅延の注入、
+アカウントの規模（AC数、他の家電・学習済み信号の数、スマートメーター）を設定できる。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+import asyncio
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+TOKEN = "test-token"
+
+_TEMPS_ABS = [str(t / 2) if t % 2 else str(t // 2) for t in range(36, 65)]   # "18" .. "32"（0.5刻み）
+_TEMPS_REL = [str(t / 2) if t % 2 else str(t // 2) for t in range(-4, 5)]    # "-2" .. "2"
+_VOL = ["1", "2", "3", "4", "5", "auto"]
+_DIR = ["1", "2", "3", "4", "5", "auto", "swing"]
+_DIRH = ["1", "2", "3", "4", "5", "swing"]
+
+# aircon_settings のリクエスト項目 → settings の項目
+_FORM_TO_SETTINGS = {
+    "operation_mode": "mode",
+    "temperature": "temp",
+    "air_volume": "vol",
+    "air_direction": "dir",
+    "air_direction_h": "dirh",
+    "button": "button",
+}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _aircon_range() -> dict[str, Any]:
+    mode = {"dir": _DIR, "dirh": _DIRH, "vol": _VOL}
+    return {
+        "modes": {
+            "cool": {"temp": _TEMPS_ABS, **mode},
+            "warm": {"temp": _TEMPS_ABS, **mode},
+            "dry": {"temp": _TEMPS_REL, **mode},
+            "auto": {"temp": _TEMPS_REL, **mode},
+            "blow": {"temp": [""], **mode},
+        },
+        "fixedButtons": ["power-off"],
+    }
+
+
+def _signals(prefix: str, count: int) -> list[dict[str, Any]]:
+    return [{"id": f"{prefix}-sig-{i:03d}", "name": f"Signal {i}", "image": "ico_io"} for i in range(count)]
+
+
+@dataclass
+class FakeAccount:
+    """擬似サーバーが返すアカウントの中身（生JSONのまま保持する）"""
+
+    user: dict[str, Any]
+    appliances: list[dict[str, Any]]
+    devices: list[dict[str, Any]]
+
+    @classmethod
+    def generate(
+        cls,
+        acs: int = 1,
+        acs_per_bridge: int = 1,
+        other_appliances: int = 0,
+        signals: int = 0,
+        smart_meters: int = 0,
+    ) -> FakeAccount:
+        """AC・Remo本体・その他の家電・スマートメーターからなるアカウントを作る"""
+        now = _now_iso()
+        devices: list[dict[str, Any]] = []
+        appliances: list[dict[str, Any]] = []
+        for b in range((acs + acs_per_bridge - 1) // acs_per_bridge or 1):
+            devices.append({
+                "id": f"dev-{b:04d}",
+                "name": f"Remo {b}",
+                "temperature_offset": 0,
+                "humidity_offset": 0,
+                "created_at": now,
+                "updated_at": now,
+                "firmware_version": "Remo/1.14.6",
+                "mac_address": f"00:00:00:00:{b // 256:02x}:{b % 256:02x}",
+                "serial_number": f"1W3200{b:08d}",
+                "newest_events": {
+                    "te": {"val": 27.5, "created_at": now},
+                    "hu": {"val": 55, "created_at": now},
+                    "il": {"val": 120, "created_at": now},
+                    "mo": {"val": 1, "created_at": now},
+                },
+            })
+        for i in range(acs):
+            device = devices[i // acs_per_bridge]
+            appliances.append({
+                "id": f"ac-{i:04d}",
+                "type": "AC",
+                "nickname": f"AC {i}",
+                "image": "ico_ac_1",
+                "device": {k: device[k] for k in ("id", "name", "firmware_version", "serial_number")},
+                "model": {
+                    "id": "model-ac",
+                    "manufacturer": "sharp",
+                    "remote_name": "A909JB",
+                    "name": "Sharp AC 027",
+                    "image": "ico_ac_1",
+                },
+                "settings": {
+                    "temp": "26",
+                    "temp_unit": "c",
+                    "mode": "cool",
+                    "vol": "auto",
+                    "dir": "auto",
+                    "dirh": "swing",
+                    "button": "",
+                    "updated_at": now,
+                },
+                "aircon": {"range": _aircon_range(), "tempUnit": "c"},
+                "signals": _signals(f"ac-{i:04d}", signals),
+            })
+        for i in range(other_appliances):
+            device = devices[i % len(devices)]
+            appliances.append({
+                "id": f"ir-{i:04d}",
+                "type": "IR",
+                "nickname": f"Light {i}",
+                "image": "ico_light",
+                "device": {k: device[k] for k in ("id", "name", "firmware_version", "serial_number")},
+                "model": None,
+                "settings": None,
+                "aircon": None,
+                "signals": _signals(f"ir-{i:04d}", signals),
+            })
+        for i in range(smart_meters):
+            appliances.append({
+                "id": f"meter-{i:04d}",
+                "type": "EL_SMART_METER",
+                "nickname": f"Smart meter {i}",
+                "image": "ico_smartmeter",
+                "device": {"id": f"remo-e-{i:04d}", "name": f"Remo E {i}"},
+                "smart_meter": {
+                    "echonetlite_properties": [
+                        {"name": "coefficient", "epc": 211, "val": "1", "updated_at": now},
+                        {"name": "cumulative_electric_energy_effective_digits", "epc": 215, "val": "6", "updated_at": now},
+                        {"name": "normal_direction_cumulative_electric_energy", "epc": 224, "val": "123456", "updated_at": now},
+                        {"name": "cumulative_electric_energy_unit", "epc": 225, "val": "1", "updated_at": now},
+                        {"name": "measured_instantaneous", "epc": 231, "val": "520", "updated_at": now},
+                    ]
+                },
+                "signals": [],
+            })
+        return cls(
+            user={"id": "user-0001", "nickname": "tester", "superuser": True},
+            appliances=appliances,
+            devices=devices,
+        )
+
+    @property
+    def acs(self) -> list[dict[str, Any]]:
+        return [a for a in self.appliances if a.get("type") == "AC"]
+
+    def appliance(self, appliance_id: str) -> dict[str, Any] | None:
+        return next((a for a in self.appliances if a["id"] == appliance_id), None)
+
+
+@dataclass
+class Fault:
+    """注入する失敗。status が None なら遅延だけ入れて通常の応答を返す"""
+
+    status: int | None = None
+    path: str | None = None       # 前方一致（None なら全パス）
+    method: str | None = None
+    times: int = 1
+    delay: float = 0.0
+    retry_after: int | None = None
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and (self.path is None or path.startswith(self.path))
+
+
+@dataclass
+class RecordedRequest:
+    method: str
+    path: str
+    form: dict[str, str]
+    peer: tuple | None = None      # クライアント側の (ホスト, ポート)。接続の使い回しを数えるのに使う
+    at: float = field(default_factory=time.monotonic)
+
+
+class FakeNatureServer:
+    """127.0.0.1 で待ち受ける擬似 Nature クラウド。url を NatureRemoApi の base_url に渡して使う"""
+
+    def __init__(
+        self,
+        account: FakeAccount | None = None,
+        token: str = TOKEN,
+        latency: float = 0.0,
+        rate_limit: int = 10_000,
+        rate_window: float = 300.0,
+    ) -> None:
+        self.account = account or FakeAccount.generate()
+        self.token = token
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.faults: list[Fault] = []
+        self.requests: list[RecordedRequest] = []
+        self._window_start = time.time()
+        self._remaining = rate_limit
+        self._server: TestServer | None = None
+
+    # ===== 起動・停止 =====
+
+    async def start(self) -> None:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/1/users/me", self._users_me)
+        app.router.add_get("/1/appliances", self._appliances)
+        app.router.add_get("/1/devices", self._devices)
+        app.router.add_post("/1/appliances/{appliance_id}/aircon_settings", self._aircon_settings)
+        self._server = TestServer(app, host="127.0.0.1")
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        return str(self._server.make_url("/1"))
+
+    # ===== テストからの操作 =====
+
+    def inject(self, status: int | None = None, **kwargs: Any) -> Fault:
+        """次に条件に合う times 回のリクエストを失敗（または遅延）させる"""
+        fault = Fault(status=status, **kwargs)
+        self.faults.append(fault)
+        return fault
+
+    def count(self, method: str | None = None, path: str | None = None) -> int:
+        return sum(
+            1 for r in self.requests
+            if (method is None or r.method == method) and (path is None or r.path.startswith(path))
+        )
+
+    def connections(self) -> int:
+        """記録中のリクエストが使ったTCP接続の数"""
+        return len({r.peer for r in self.requests})
+
+    def reset_counts(self) -> None:
+        self.requests.clear()
+
+    def set_temperature(self, device_id: str, value: float) -> None:
+        """Remo本体の室温（newest_events.te）を変える"""
+        for d in self.account.devices:
+            if d["id"] == device_id:
+                d["newest_events"]["te"] = {"val": value, "created_at": _now_iso()}
+
+    # ===== ハンドラ =====
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        path = request.path.removeprefix("/1")
+        form = dict(await request.post()) if request.method == "POST" else {}
+        peer = request.transport.get_extra_info("peername") if request.transport is not None else None
+        self.requests.append(RecordedRequest(request.method, path, {k: str(v) for k, v in form.items()}, peer))
+
+        fault = next((f for f in self.faults if f.matches(request.method, path)), None)
+        if fault is not None:
+            fault.times -= 1
+            if fault.times <= 0:
+                self.faults.remove(fault)
+        delay = self.latency + (fault.delay if fault is not None else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return self._error(401, "Unauthorized")
+        if fault is not None and fault.status is not None:
+            headers = {}
+            if fault.retry_after is not None:
+                headers["Retry-After"] = str(fault.retry_after)
+            return self._error(fault.status, "Injected fault", headers)
+
+        # 固定ウィンドウのレート制限（コマンドも同じ枠を消費する）
+        now = time.time()
+        if now - self._window_start >= self.rate_window:
+            self._window_start = now
+            self._remaining = self.rate_limit
+        if self._remaining <= 0:
+            reset_in = int(self._window_start + self.rate_window - now) + 1
+            return self._error(429, "Too Many Requests", {"Retry-After": str(reset_in)})
+        self._remaining -= 1
+
+        response = await handler(request)
+        response.headers.update(self._rate_limit_headers())
+        return response
+
+    def _rate_limit_headers(self) -> dict[str, str]:
+        return {
+            "X-Rate-Limit-Limit": str(self.rate_limit),
+            "X-Rate-Limit-Remaining": str(self._remaining),
+            "X-Rate-Limit-Reset": str(int(self._window_start + self.rate_window)),
+        }
+
+    def _error(self, status: int, message: str, headers: dict[str, str] | None = None) -> web.Response:
+        return web.json_response(
+            {"code": status, "message": message},
+            status=status,
+            headers={**self._rate_limit_headers(), **(headers or {})},
+        )
+
+    async def _users_me(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.user)
+
+    async def _appliances(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.appliances)
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        return web.json_response(self.account.devices)
+
+    async def _aircon_settings(self, request: web.Request) -> web.Response:
+        appliance = self.account.appliance(request.match_info["appliance_id"])
+        if appliance is None or appliance.get("type") != "AC":
+            return self._error(404, "Not Found")
+        form = {k: str(v) for k, v in (await request.post()).items()}
+        settings = dict(appliance["settings"])
+        for key, value in form.items():
+            if key in _FORM_TO_SETTINGS:
+                settings[_FORM_TO_SETTINGS[key]] = value
+        if "button" not in form:
+            # 運転系の設定を送ると電源ONになる
+            settings["button"] = ""
+        settings["updated_at"] = _now_iso()
+        appliance["settings"] = settings
+        return web.json_response(settings)
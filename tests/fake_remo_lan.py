@@ -0,0 +1,62 @@
+"""Remo本体のLAN内API（/messages）の擬似サーバー（aiohttp.web）
+
+GET は最後に受信した赤外線フレームを返し、POST は送られたフレームを記録する。
+本物と同じく X-Requested-With ヘッダの無いリクエストは 400 で拒否する。
+"""
+from __future__ import annotations
+from typing import Any
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+FRAME = {"format": "us", "freq": 38, "data": [3400, 1700, 450, 1250, 450, 400, 450, 1250]}
+
+
+class FakeRemoLanServer:
+    def __init__(self) -> None:
+        self.last_message: dict[str, Any] | None = None
+        self.sent: list[dict[str, Any]] = []
+        self.fail = False   # True の間は 500 を返す
+        self._server: TestServer | None = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/messages", self._get)
+        app.router.add_post("/messages", self._post)
+        self._server = TestServer(app, host="127.0.0.1")
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    @property
+    def host(self) -> str:
+        """オプションの local_host に入れる値（ホスト:ポート）"""
+        assert self._server is not None
+        return f"{self._server.host}:{self._server.port}"
+
+    def receive(self, message: dict[str, Any]) -> None:
+        """リモコンの赤外線をRemoが受信したことにする"""
+        self.last_message = message
+
+    def _check(self, request: web.Request) -> web.Response | None:
+        if request.headers.get("X-Requested-With") is None:
+            return web.Response(status=400, text="X-Requested-With header required")
+        if self.fail:
+            return web.Response(status=500)
+        return None
+
+    async def _get(self, request: web.Request) -> web.Response:
+        if (error := self._check(request)) is not None:
+            return error
+        if self.last_message is None:
+            return web.Response(status=204)
+        return web.json_response(self.last_message)
+
+    async def _post(self, request: web.Request) -> web.Response:
+        if (error := self._check(request)) is not None:
+            return error
+        self.sent.append(await request.json())
+        return web.Response(status=200)
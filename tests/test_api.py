@@ -0,0 +1,47 @@
+"""NatureRemoApi を擬似サーバーに対して動かす"""
+from __future__ import annotations
+
+import pytest
+
+from common import make_api
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.api import (
+    NatureRemoApi,
+    RemoAuthError,
+    RemoRateLimitError,
+)
+
+
+async def test_get_updates_rate_limit(session, fake_nature: FakeNatureServer) -> None:
+    api = make_api(session, fake_nature)
+    apps = await api._req("GET", "/appliances")
+    assert [a["id"] for a in apps] == [a["id"] for a in fake_nature.account.appliances]
+    assert api.rate_limit.limit == fake_nature.rate_limit
+    assert api.rate_limit.remaining == fake_nature.rate_limit - 1
+    assert api.stats.total_requests == 1
+
+
+async def test_unauthorized(session, fake_nature: FakeNatureServer) -> None:
+    api = NatureRemoApi(session, "wrong-token", base_url=fake_nature.url)
+    with pytest.raises(RemoAuthError):
+        await api._req("GET", "/users/me")
+
+
+async def test_rate_limited_sets_retry_at(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(429, path="/devices", retry_after=42)
+    api = make_api(session, fake_nature)
+    with pytest.raises(RemoRateLimitError) as exc:
+        await api._req("GET", "/devices")
+    assert exc.value.retry_after == 42
+    assert api.rate_limit.retry_at is not None
+    # 429 は再試行しない（Retry-After まで待つのは共有ポーラーの仕事）
+    assert fake_nature.count("GET", "/devices") == 1
+
+
+async def test_aircon_settings_round_trip(session, fake_nature: FakeNatureServer) -> None:
+    api = make_api(session, fake_nature, coalesce_window=0)
+    ac_id = fake_nature.account.acs[0]["id"]
+    res = await api.async_set_temperature(ac_id, 24.5)
+    assert res["temp"] == "24.5"
+    assert fake_nature.requests[-1].form == {"temperature": "24.5"}
@@ -0,0 +1,38 @@
+"""能力表・直近の状態の保存（起動時の即時復元用）"""
+from __future__ import annotations
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.coordinator import CACHE_SAVE_DELAY
+
+
+async def test_unload_flushes_cache(hass, hass_storage, fake_nature: FakeNatureServer) -> None:
+    entry = (await async_setup_acs(hass, fake_nature, 1))[0]
+    key = f"{DOMAIN}.{entry.entry_id}"
+    assert key not in hass_storage
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    # 遅延保存を待たずに書き出されている
+    assert hass_storage[key]["data"]["ac"]["id"] == entry.unique_id
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][entry.entry_id].restored_from_cache
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_remove_entry_removes_cache(hass, hass_storage, fake_nature: FakeNatureServer) -> None:
+    entry = (await async_setup_acs(hass, fake_nature, 1))[0]
+    key = f"{DOMAIN}.{entry.entry_id}"
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert key not in hass_storage
+
+    # 削除前の遅延保存が後から書き戻さない
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=CACHE_SAVE_DELAY * 2))
+    await hass.async_block_till_done()
+    assert key not in hass_storage
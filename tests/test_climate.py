@@ -0,0 +1,54 @@
+"""climate エンティティのサービス"""
+from __future__ import annotations
+
+import pytest
+from homeassistant.components.climate import ATTR_HVAC_MODE, HVACMode
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+from homeassistant.exceptions import ServiceValidationError
+
+from common import DOMAIN, async_setup_acs, climate_entity_id
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.const import SERVICE_APPLY_STATE
+
+
+async def _apply_state(hass, entity_id: str, **data) -> None:
+    await hass.services.async_call(DOMAIN, SERVICE_APPLY_STATE, {ATTR_ENTITY_ID: entity_id, **data}, blocking=True)
+
+
+@pytest.mark.parametrize(
+    ("hvac_mode", "temperature"),
+    [
+        (HVACMode.DRY, 26),        # dry は相対値（-2..2）
+        (HVACMode.FAN_ONLY, 26),   # 送風は温度なし
+        (HVACMode.COOL, 35),       # 範囲外
+        (HVACMode.COOL, 10),
+        (HVACMode.OFF, 26),
+    ],
+)
+async def test_apply_state_rejects_temperature(
+    hass, fake_nature: FakeNatureServer, unload_entries, hvac_mode: HVACMode, temperature: float
+) -> None:
+    await async_setup_acs(hass, fake_nature, 1)
+    entity_id = climate_entity_id(hass, fake_nature.account.acs[0]["id"])
+    with pytest.raises(ServiceValidationError):
+        await _apply_state(hass, entity_id, **{ATTR_HVAC_MODE: hvac_mode, ATTR_TEMPERATURE: temperature})
+    assert fake_nature.count("POST") == 0
+
+
+@pytest.mark.parametrize(
+    ("hvac_mode", "temperature", "sent"),
+    [
+        (HVACMode.DRY, 1.5, "1.5"),
+        (HVACMode.HEAT_COOL, -2, "-2"),
+        (HVACMode.COOL, 24.3, "24.5"),   # 0.5℃刻みに丸める
+    ],
+)
+async def test_apply_state_sends_temperature(
+    hass, fake_nature: FakeNatureServer, unload_entries, hvac_mode: HVACMode, temperature: float, sent: str
+) -> None:
+    await async_setup_acs(hass, fake_nature, 1)
+    entity_id = climate_entity_id(hass, fake_nature.account.acs[0]["id"])
+    await _apply_state(hass, entity_id, **{ATTR_HVAC_MODE: hvac_mode, ATTR_TEMPERATURE: temperature})
+    assert fake_nature.count("POST") == 1
+    assert fake_nature.requests[-1].form["temperature"] == sent
@@ -0,0 +1,100 @@
+"""aircon_settings の送信キュー（ACごとに1本ずつ・後勝ちでまとめる）"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from homeassistant.components.climate import DOMAIN as CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+
+from common import DOMAIN, async_setup_acs, climate_entity_id
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi
+from custom_components.hass_nature_remo_climate.transport import RemoResponse
+
+
+class _SlowTransport:
+    """POSTを latency 秒かけて受け、送られた順と同時に送信中だった本数を記録する"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.posts: list[tuple[str, dict[str, str]]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, method, url, headers, data) -> RemoResponse:
+        self.posts.append((url, dict(data or {})))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        body = json.dumps({"temp": (data or {}).get("temperature", "")}).encode()
+        return RemoResponse(200, {}, body, "application/json")
+
+
+async def test_rapid_slider_changes() -> None:
+    """スライダーを20回動かしても、POSTは1本ずつ順に送られ最後の値で終わる"""
+    transport = _SlowTransport(latency=0.1)
+    api = NatureRemoApi(None, "token", transport=transport, coalesce_window=0.05)
+    values = [20 + i * 0.5 for i in range(20)]
+
+    calls = []
+    for v in values:
+        calls.append(asyncio.create_task(api.async_set_temperature("ac-1", v)))
+        await asyncio.sleep(0.01)
+    results = await asyncio.gather(*calls)
+
+    sent = [float(form["temperature"]) for _, form in transport.posts]
+    assert 1 < len(sent) < len(values)
+    assert transport.max_in_flight == 1
+    # 追い越しが無い（送った値は操作した順のまま）
+    assert sent == sorted(sent)
+    assert sent[-1] == values[-1]
+    assert results[-1] == {"temp": "29.5"}
+    assert not api._sending and not api._pending_settings
+
+
+async def test_isolated_command_is_not_delayed() -> None:
+    """送信中でなければ待たずに送る（まとめるのは送信中に届いた分だけ）"""
+    transport = _SlowTransport(latency=0)
+    api = NatureRemoApi(None, "token", transport=transport)
+    started = time.monotonic()
+    await api.async_set_temperature("ac-1", 24)
+    assert time.monotonic() - started < 0.02
+    assert len(transport.posts) == 1
+
+
+async def test_appliances_are_sent_independently() -> None:
+    """別のACへのPOSTは互いを待たない"""
+    transport = _SlowTransport(latency=0.1)
+    api = NatureRemoApi(None, "token", transport=transport, coalesce_window=0)
+    await asyncio.gather(api.async_set_temperature("ac-1", 24), api.async_set_temperature("ac-2", 25))
+    assert len(transport.posts) == 2
+    assert transport.max_in_flight == 2
+
+
+async def test_batched_response_is_applied_once(hass, fake_nature, unload_entries) -> None:
+    """まとめて送ったPOSTの応答は、待ち手の数によらず共有ポーラーへ1回だけ反映する"""
+    await async_setup_acs(hass, fake_nature, 2)
+    hub = next(iter(hass.data[DOMAIN]["accounts"].values()))
+    updates = []
+    unsub = hub.async_add_listener(lambda: updates.append(hub.data))
+    entity_id = climate_entity_id(hass, fake_nature.account.acs[0]["id"])
+
+    await asyncio.gather(*(
+        hass.services.async_call(
+            CLIMATE_DOMAIN,
+            SERVICE_SET_TEMPERATURE,
+            {ATTR_ENTITY_ID: entity_id, ATTR_TEMPERATURE: 20 + i / 2},
+            blocking=True,
+        )
+        for i in range(10)
+    ))
+    unsub()
+    posts = fake_nature.count("POST")
+    assert posts < 10
+    assert len(updates) == posts
+    assert hass.states.get(entity_id).attributes[ATTR_TEMPERATURE] == 24.5
@@ -0,0 +1,128 @@
+"""設定フロー（トークン入力→AC選択→エントリ作成）"""
+from __future__ import annotations
+
+from homeassistant import config_entries
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from common import DOMAIN, async_setup_acs, climate_entity_id
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.const import (
+    CONF_APPLIANCE_ID,
+    CONF_OPTIMISTIC,
+    CONF_POLL_MAX,
+    CONF_POLL_MIN,
+    CONF_POLL_POLICY,
+    CONF_TOKEN,
+    DATA_DISCOVERY,
+    POLL_POLICY_ADAPTIVE,
+)
+
+
+async def _start_flow(hass: HomeAssistant, token: str) -> dict:
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    assert result["type"] is FlowResultType.FORM
+    return await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_TOKEN: token})
+
+
+def _stash(hass: HomeAssistant) -> dict:
+    return hass.data.get(DOMAIN, {}).get(DATA_DISCOVERY, {})
+
+
+async def test_onboarding_request_count(hass: HomeAssistant, fake_nature: FakeNatureServer, unload_entries) -> None:
+    """追加の完了まで、/users/me・/appliances・/devices を1回ずつしか取得しない"""
+    result = await _start_flow(hass, fake_nature.token)
+    assert result["step_id"] == "select"
+    ac_id = fake_nature.account.acs[0]["id"]
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_APPLIANCE_ID: ac_id})
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    assert fake_nature.count("GET", "/users/me") == 1
+    assert fake_nature.count("GET", "/appliances") == 1
+    assert fake_nature.count("GET", "/devices") == 1
+    assert hass.states.get(climate_entity_id(hass, ac_id)) is not None
+    assert not _stash(hass)
+
+
+async def test_regular_poll_does_not_use_stash(
+    hass: HomeAssistant, fake_nature: FakeNatureServer, unload_entries
+) -> None:
+    """稼働中の共有ポーラーの定期取得は、設定フローのデータを横取りしない"""
+    await async_setup_acs(hass, fake_nature, 1)
+    hub = next(iter(hass.data[DOMAIN]["accounts"].values()))
+
+    result = await _start_flow(hass, fake_nature.token)
+    assert result["step_id"] == "select"
+    fake_nature.reset_counts()
+    await hub.async_refresh()
+    assert fake_nature.count("GET", "/appliances") == 1
+    assert fake_nature.token in _stash(hass)
+
+    # 2台目を追加すると、そのACの初回分は引き継いだデータで済む
+    ac_id = fake_nature.account.acs[1]["id"]
+    fake_nature.reset_counts()
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_APPLIANCE_ID: ac_id})
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+    assert fake_nature.count() == 0
+    assert hub.has_appliance(ac_id)
+
+
+async def test_abandoned_flow_drops_stash(hass: HomeAssistant, fake_nature: FakeNatureServer) -> None:
+    result = await _start_flow(hass, fake_nature.token)
+    assert fake_nature.token in _stash(hass)
+    hass.config_entries.flow.async_abort(result["flow_id"])
+    assert not _stash(hass)
+
+
+async def test_already_configured_drops_stash(
+    hass: HomeAssistant, fake_nature: FakeNatureServer, unload_entries
+) -> None:
+    entries = await async_setup_acs(hass, fake_nature, 1)
+    result = await _start_flow(hass, fake_nature.token)
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_APPLIANCE_ID: entries[0].unique_id}
+    )
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    assert not _stash(hass)
+
+
+async def test_invalid_token(hass: HomeAssistant, fake_nature: FakeNatureServer) -> None:
+    result = await _start_flow(hass, "wrong-token")
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "auth"}
+    assert not _stash(hass)
+
+
+async def test_options_flow(hass: HomeAssistant, fake_nature: FakeNatureServer, unload_entries, caplog) -> None:
+    entry = (await async_setup_acs(hass, fake_nature, 1))[0]
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    # 下限が上限より大きければ受け付けない
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {CONF_POLL_POLICY: POLL_POLICY_ADAPTIVE, CONF_POLL_MIN: 300, CONF_POLL_MAX: 60},
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "poll_min_gt_max"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {CONF_POLL_POLICY: POLL_POLICY_ADAPTIVE, CONF_POLL_MIN: 30, CONF_POLL_MAX: 300, CONF_OPTIMISTIC: True},
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+    assert entry.options[CONF_POLL_POLICY] == POLL_POLICY_ADAPTIVE
+    assert entry.options[CONF_POLL_MIN] == 30
+    assert entry.options[CONF_OPTIMISTIC] is True
+    # オプション変更で再読み込みされる
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][entry.entry_id].entry.options[CONF_POLL_MAX] == 300
+    # HA 2025.12 で使えなくなる config_entry の代入をしていない
+    assert "sets option flow config_entry explicitly" not in caplog.text
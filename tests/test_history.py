@@ -0,0 +1,113 @@
+"""室温履歴のリングバッファと、差分更新する最小二乗の和"""
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.hass_nature_remo_climate.history import TemperatureHistory
+
+EPOCH = 1_700_000_000.0
+
+
+def _brute_slope(samples: list[tuple], capacity: int) -> float | None:
+    """バッファに残っている最新区間（同じモード・設定温度が続く末尾）だけで回帰し直す"""
+    window = samples[-capacity:]
+    _, _, target, mode = window[-1]
+    segment = []
+    for t, y, tg, m in reversed(window):
+        if m != mode or tg != target:
+            break
+        segment.append((t, y))
+    points = [(t, y) for t, y in segment if y is not None]
+    n = len(points)
+    if n < 2:
+        return None
+    mt = sum(t for t, _ in points) / n
+    my = sum(y for _, y in points) / n
+    stt = sum((t - mt) ** 2 for t, _ in points)
+    return sum((t - mt) * (y - my) for t, y in points) / stt
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_slope_matches_brute_force(seed: int) -> None:
+    rng = random.Random(seed)
+    capacity = 16
+    history = TemperatureHistory(capacity)
+    samples: list[tuple] = []
+    t, y, target, mode = EPOCH, 28.0, 24.0, "cool"
+    for _ in range(500):
+        t += rng.uniform(30, 120)
+        y += rng.uniform(-0.3, 0.1)
+        if rng.random() < 0.05:
+            mode = rng.choice(["cool", "dry", "off"])
+        if rng.random() < 0.05:
+            target = rng.choice([23.0, 24.0, 25.0])
+        observed = None if rng.random() < 0.1 else y
+        history.append(t, observed, target, mode)
+        samples.append((t, observed, target, mode))
+
+        expected = _brute_slope(samples, capacity)
+        actual = history.slope()
+        if expected is None:
+            assert actual is None
+        else:
+            assert actual == pytest.approx(expected, rel=1e-6, abs=1e-12)
+    assert len(history) == capacity
+    assert history.last_timestamp == pytest.approx(t)
+
+
+def test_segment_resets_on_mode_or_target_change() -> None:
+    history = TemperatureHistory()
+    for i in range(5):
+        history.append(EPOCH + i * 60, 28 - i * 0.1, 24, "cool")
+    assert history.slope() == pytest.approx(-0.1 / 60)
+
+    # 設定温度が変わると、それまでの傾きは使わない
+    history.append(EPOCH + 300, 27.5, 23, "cool")
+    assert history.slope() is None
+    assert not history.is_current(24, "cool")
+    assert history.is_current(23, "cool")
+    history.append(EPOCH + 360, 27.3, 23, "cool")
+    assert history.slope() == pytest.approx(-0.2 / 60)
+
+    # モードの変更も同じ
+    history.append(EPOCH + 420, 27.3, 23, "dry")
+    assert history.slope() is None
+
+
+def test_eviction_keeps_only_capacity_samples() -> None:
+    history = TemperatureHistory(capacity=4)
+    # 前半は急に、後半はゆっくり下がる。容量ぶんだけ残るので後半の傾きになる
+    for i in range(10):
+        history.append(EPOCH + i * 60, 30 - i, 24, "cool")
+    for i in range(10, 14):
+        history.append(EPOCH + i * 60, 20 - (i - 10) * 0.1, 24, "cool")
+    assert len(history) == 4
+    assert history.slope() == pytest.approx(-0.1 / 60)
+
+
+def test_time_to_target() -> None:
+    history = TemperatureHistory()
+    for i in range(4):
+        history.append(EPOCH + i * 60, 28 - i * 0.5, 24, "cool")
+    # 28 - 1.5 = 26.5℃ から 0.5℃/分で 24℃ まで → 5分
+    assert history.time_to_target(26.5, 24, "cool") == pytest.approx(300)
+    assert history.time_to_target(24, 24, "cool") == 0.0
+    # 設定温度から離れていく向き（設定温度より低いのにさらに下がっている）
+    assert history.time_to_target(26.5, 30, "cool") is None
+    # 今のモード・設定温度の履歴でなければ推定しない
+    assert history.time_to_target(26.5, 24, "warm") is None
+    assert history.time_to_target(None, 24, "cool") is None
+
+
+def test_flat_or_single_sample_has_no_slope() -> None:
+    history = TemperatureHistory()
+    assert history.slope() is None
+    history.append(EPOCH, 26.0, 24, "cool")
+    assert history.slope() is None
+    history.append(EPOCH + 60, 26.0, 24, "cool")
+    assert history.slope() == 0
+    assert history.time_to_target(26.0, 24, "cool") is None
+    assert math.isclose(history.last_timestamp, EPOCH + 60)
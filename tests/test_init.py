@@ -0,0 +1,29 @@
+"""セットアップ・アンロードと共有ポーラー"""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntryState
+
+from common import DOMAIN, async_setup_acs, climate_entity_id
+from fake_nature import FakeNatureServer
+
+
+async def test_setup_shares_one_poller(hass, fake_nature: FakeNatureServer, unload_entries) -> None:
+    entries = await async_setup_acs(hass, fake_nature, 2)
+    assert all(e.state is ConfigEntryState.LOADED for e in entries)
+    for ac in fake_nature.account.acs:
+        state = hass.states.get(climate_entity_id(hass, ac["id"]))
+        assert state is not None
+        assert state.state == "cool"
+    # ACが2台でも取得は /appliances + /devices の1組だけ
+    assert fake_nature.count("GET", "/appliances") == 1
+    assert fake_nature.count("GET", "/devices") == 1
+
+
+async def test_unload(hass, fake_nature: FakeNatureServer) -> None:
+    entries = await async_setup_acs(hass, fake_nature, 2)
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert all(e.state is ConfigEntryState.NOT_LOADED for e in entries)
+    # 最後のエントリが外れたら共有ポーラーも破棄される
+    assert not hass.data[DOMAIN].get("accounts")
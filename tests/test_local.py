@@ -0,0 +1,104 @@
+"""学習済みの赤外線フレームのLAN経由送信（擬似 Remo 本体に対して動かす）"""
+from __future__ import annotations
+from datetime import timedelta
+
+import pytest
+from homeassistant.components.climate import DOMAIN as CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from common import DOMAIN, async_setup_acs, climate_entity_id
+from fake_nature import FakeNatureServer
+from fake_remo_lan import FRAME, FakeRemoLanServer
+
+from custom_components.hass_nature_remo_climate.const import CONF_LOCAL_HOST, SERVICE_LEARN_SIGNAL
+
+
+async def _setup(hass, fake_nature: FakeNatureServer, lan: FakeRemoLanServer) -> tuple[str, str]:
+    entry = (await async_setup_acs(hass, fake_nature, 1, options={CONF_LOCAL_HOST: lan.host}))[0]
+    return entry.entry_id, climate_entity_id(hass, entry.unique_id)
+
+
+async def _learn(hass, entity_id: str, temperature: float) -> None:
+    await hass.services.async_call(
+        DOMAIN, SERVICE_LEARN_SIGNAL, {ATTR_ENTITY_ID: entity_id, ATTR_TEMPERATURE: temperature}, blocking=True
+    )
+
+
+async def _set_temperature(hass, entity_id: str, temperature: float) -> None:
+    await hass.services.async_call(
+        CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE, {ATTR_ENTITY_ID: entity_id, ATTR_TEMPERATURE: temperature},
+        blocking=True,
+    )
+
+
+async def test_learn_signal_stores_frame(
+    hass, hass_storage, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer
+) -> None:
+    entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    fake_remo_lan.receive(FRAME)
+    await _learn(hass, entity_id, 24)
+    assert await hass.config_entries.async_unload(entry_id)
+    # 設定値（button|mode|temp|vol|dir|dirh）ごとに保存される
+    assert hass_storage[f"{DOMAIN}.{entry_id}.signals"]["data"]["signals"] == {"|cool|24|auto|auto|swing": FRAME}
+
+
+async def test_learn_signal_without_received_frame(
+    hass, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer, unload_entries
+) -> None:
+    _entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    with pytest.raises(HomeAssistantError):
+        await _learn(hass, entity_id, 24)
+
+
+async def test_learned_setting_is_sent_over_lan(
+    hass, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer, unload_entries
+) -> None:
+    _entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    fake_remo_lan.receive(FRAME)
+    await _learn(hass, entity_id, 24)
+
+    await _set_temperature(hass, entity_id, 24)
+    assert fake_remo_lan.sent == [FRAME]
+    assert fake_nature.count("POST") == 0
+    assert hass.states.get(entity_id).attributes[ATTR_TEMPERATURE] == 24
+
+
+async def test_failed_lan_send_falls_back_to_cloud(
+    hass, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer, unload_entries
+) -> None:
+    _entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    fake_remo_lan.receive(FRAME)
+    await _learn(hass, entity_id, 24)
+
+    fake_remo_lan.fail = True
+    await _set_temperature(hass, entity_id, 24)
+    assert fake_remo_lan.sent == []
+    assert fake_nature.count("POST", "/appliances") == 1
+    assert fake_nature.requests[-1].form == {"temperature": "24"}
+
+
+async def test_unlearned_setting_goes_to_cloud(
+    hass, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer, unload_entries
+) -> None:
+    _entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    fake_remo_lan.receive(FRAME)
+    await _learn(hass, entity_id, 24)
+
+    await _set_temperature(hass, entity_id, 25)
+    assert fake_remo_lan.sent == []
+    assert fake_nature.requests[-1].form == {"temperature": "25"}
+
+
+async def test_remove_entry_removes_signals(
+    hass, hass_storage, fake_nature: FakeNatureServer, fake_remo_lan: FakeRemoLanServer
+) -> None:
+    entry_id, entity_id = await _setup(hass, fake_nature, fake_remo_lan)
+    fake_remo_lan.receive(FRAME)
+    await _learn(hass, entity_id, 24)
+    await hass.config_entries.async_remove(entry_id)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.{entry_id}.signals" not in hass_storage
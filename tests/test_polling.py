@@ -0,0 +1,90 @@
+"""adaptive ポーリング（ACの状態から共有ポーラーの間隔を決める）"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.const import (
+    CONF_POLL_MAX,
+    CONF_POLL_MIN,
+    CONF_POLL_POLICY,
+    DEFAULT_SCAN_INTERVAL,
+    POLL_POLICY_ADAPTIVE,
+)
+
+POLL_MIN = 20
+POLL_MAX = 900
+OPTIONS = {CONF_POLL_POLICY: POLL_POLICY_ADAPTIVE, CONF_POLL_MIN: POLL_MIN, CONF_POLL_MAX: POLL_MAX}
+
+
+async def _setup(hass, server: FakeNatureServer):
+    entry = (await async_setup_acs(hass, server, 1, OPTIONS))[0]
+    coord = hass.data[DOMAIN][entry.entry_id]
+    # セットアップ時の取得はエントリが共有ポーラーに参加する前なので、1回取得し直してから見る
+    await coord.hub.async_refresh()
+    return coord.hub, coord
+
+
+def _bridge_id(server: FakeNatureServer) -> str:
+    return server.account.acs[0]["device"]["id"]
+
+
+@pytest.fixture
+def power_off(fake_nature: FakeNatureServer) -> None:
+    fake_nature.account.acs[0]["settings"]["button"] = "power-off"
+
+
+async def test_off_and_stable_uses_poll_max(hass, fake_nature: FakeNatureServer, power_off, unload_entries) -> None:
+    hub, _ = await _setup(hass, fake_nature)
+    # 比べる前回値が無いうちは通常の間隔
+    assert hub.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+    await hub.async_refresh()
+    assert hub.update_interval == timedelta(seconds=POLL_MAX)
+
+    # 室温が動いたら戻す
+    fake_nature.set_temperature(_bridge_id(fake_nature), 28.0)
+    await hub.async_refresh()
+    assert hub.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+
+
+async def test_converging_uses_poll_min(hass, fake_nature: FakeNatureServer, unload_entries) -> None:
+    # 冷房26℃に対して室温27.5℃（1℃以上離れている）
+    hub, _ = await _setup(hass, fake_nature)
+    assert hub.update_interval == timedelta(seconds=POLL_MIN)
+
+    fake_nature.set_temperature(_bridge_id(fake_nature), 26.5)
+    await hub.async_refresh()
+    assert hub.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+
+    fake_nature.set_temperature(_bridge_id(fake_nature), 25.0)
+    await hub.async_refresh()
+    assert hub.update_interval == timedelta(seconds=POLL_MIN)
+
+
+async def test_failed_poll_keeps_stability(hass, fake_nature: FakeNatureServer, power_off, unload_entries) -> None:
+    hub, coord = await _setup(hass, fake_nature)
+    await hub.async_refresh()
+    assert coord._poll_temp_stable
+
+    # 取得できなかった回は室温の比較に使わない（前回の判定のまま）
+    fake_nature.set_temperature(_bridge_id(fake_nature), 28.0)
+    fake_nature.inject(503, path="/appliances", times=100)
+    await hub.async_refresh()
+    assert not hub.last_update_success
+    assert coord._poll_temp_stable
+    assert coord._poll_prev_observed == 27.5
+
+    fake_nature.faults.clear()
+    await hub.async_refresh()
+    assert not coord._poll_temp_stable
+    # 古いデータを取り直したことにして「変わっていない」と判定しない
+    fake_nature.inject(503, path="/appliances", times=100)
+    await hub.async_refresh()
+    assert not hub.last_update_success
+    assert not coord._poll_temp_stable
+    assert hub.update_interval >= timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+    assert hub.update_interval != timedelta(seconds=POLL_MAX)
@@ -0,0 +1,132 @@
+"""タイムアウト・再試行・サーキットブレーカーを障害注入で確かめる"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from common import make_api
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.api import (
+    NatureRemoApi,
+    RemoCircuitBreaker,
+    RemoCircuitOpenError,
+    RemoConnectionError,
+    RemoTransientError,
+)
+from custom_components.hass_nature_remo_climate.transport import RemoResponse
+
+
+def _half_open(breaker: RemoCircuitBreaker) -> None:
+    """cooldown が明けた状態にする"""
+    breaker.failures = breaker.threshold
+    breaker.opened_at = time.monotonic() - breaker.cooldown - 1
+
+
+class _StubTransport:
+    """決めたレスポンスを返す（block=True なら取り消されるまで返さない）"""
+
+    def __init__(self, body: bytes = b"[]", block: bool = False) -> None:
+        self.body = body
+        self.block = block
+        self.started = asyncio.Event()
+        self.calls = 0
+
+    async def request(self, method, url, headers, data) -> RemoResponse:
+        self.calls += 1
+        self.started.set()
+        if self.block:
+            await asyncio.Event().wait()
+        return RemoResponse(200, {}, self.body, "application/json")
+
+
+async def test_5xx_is_retried(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(503, path="/appliances", times=2)
+    api = make_api(session, fake_nature, retries=2)
+    apps = await api._req("GET", "/appliances")
+    assert len(apps) == len(fake_nature.account.appliances)
+    assert fake_nature.count("GET", "/appliances") == 3
+    assert api.breaker.state == "closed"
+    assert api.breaker.failures == 0
+
+
+async def test_post_other_than_settings_is_not_retried(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(500, method="POST")
+    api = make_api(session, fake_nature, retries=2)
+    with pytest.raises(RemoTransientError):
+        await api._req("POST", "/signals/sig-1/send")
+    assert fake_nature.count("POST") == 1
+
+
+async def test_timeout_is_connection_error(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(delay=1.0, path="/devices")
+    api = make_api(session, fake_nature, timeout=0.1, retries=0)
+    with pytest.raises(RemoConnectionError):
+        await api._req("GET", "/devices")
+    assert api.stats.as_dict()["GET /devices"]["statuses"] == {"timeout": 1}
+
+
+async def test_breaker_opens_and_fails_fast(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(500, times=2)
+    api = make_api(session, fake_nature, retries=0, breaker=RemoCircuitBreaker(threshold=2, cooldown=60))
+    for _ in range(2):
+        with pytest.raises(RemoTransientError):
+            await api._req("GET", "/appliances")
+    assert api.breaker.state == "open"
+    with pytest.raises(RemoCircuitOpenError) as exc:
+        await api._req("GET", "/appliances")
+    assert 0 < exc.value.retry_in <= 60
+    # 開いている間はサーバーに届かない
+    assert fake_nature.count() == 2
+
+
+async def test_probe_success_closes(session, fake_nature: FakeNatureServer) -> None:
+    api = make_api(session, fake_nature)
+    _half_open(api.breaker)
+    assert api.breaker.state == "half_open"
+    await api._req("GET", "/devices")
+    assert api.breaker.state == "closed"
+
+
+async def test_failed_probe_reopens(session, fake_nature: FakeNatureServer) -> None:
+    fake_nature.inject(502)
+    api = make_api(session, fake_nature, retries=2)
+    _half_open(api.breaker)
+    with pytest.raises(RemoTransientError):
+        await api._req("GET", "/devices")
+    # 失敗した試行は再試行せずに開き直す
+    assert fake_nature.count() == 1
+    assert api.breaker.state == "open"
+    assert api.breaker.trips == 1
+
+
+async def test_cancelled_probe_does_not_wedge_breaker() -> None:
+    transport = _StubTransport(block=True)
+    api = NatureRemoApi(None, "token", transport=transport, retries=0)
+    _half_open(api.breaker)
+    task = asyncio.create_task(api._req("GET", "/devices"))
+    await transport.started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # half-open のまま残らず、cooldown 後にまた試せる
+    assert api.breaker.state == "open"
+    _half_open(api.breaker)
+    transport.block = False
+    assert await api._req("GET", "/devices") == []
+    assert api.breaker.state == "closed"
+
+
+async def test_malformed_json_probe_does_not_wedge_breaker() -> None:
+    transport = _StubTransport(body=b"{not json")
+    api = NatureRemoApi(None, "token", transport=transport, retries=0)
+    _half_open(api.breaker)
+    with pytest.raises(ValueError):
+        await api._req("GET", "/devices")
+    assert api.breaker.state == "open"
+    _half_open(api.breaker)
+    transport.body = b"[]"
+    assert await api._req("GET", "/devices") == []
+    assert api.breaker.state == "closed"
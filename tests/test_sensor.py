@@ -0,0 +1,70 @@
+"""スマートメーターのセンサー（/appliances の echonetlite_properties から出す）"""
+from __future__ import annotations
+
+import pytest
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.helpers import entity_registry as er
+
+from common import DOMAIN, async_setup_acs
+from fake_nature import FakeAccount, FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.models import SmartMeterReading
+
+
+def _meter(*props: tuple[int, str]) -> dict:
+    return {
+        "id": "meter-1",
+        "nickname": "Meter",
+        "smart_meter": {"echonetlite_properties": [{"epc": epc, "val": val} for epc, val in props]},
+    }
+
+
+@pytest.mark.parametrize(
+    ("props", "energy"),
+    [
+        # 積算電力量(0xE0) × 係数(0xD3) × 単位(0xE1)
+        (((0xE0, "123456"), (0xD3, "1"), (0xE1, "1")), 12345.6),
+        (((0xE0, "1234"), (0xD3, "3"), (0xE1, "10")), 37020.0),   # 0x0A: 10kWh
+        (((0xE0, "500"), (0xE1, "0")), 500.0),                    # 係数が無ければ1
+        (((0xE0, "500"),), None),                                 # 単位が無ければ出さない
+        (((0xE0, "500"), (0xE1, "5")), None),                     # 未定義の単位コード
+    ],
+)
+def test_energy_from_raw(props, energy) -> None:
+    reading = SmartMeterReading.from_raw(_meter(*props))
+    if energy is None:
+        assert reading.energy is None
+    else:
+        assert reading.energy == pytest.approx(energy)
+
+
+def test_power_from_raw() -> None:
+    reading = SmartMeterReading.from_raw(_meter((0xE7, "-120"), ("bad", "1")))
+    assert reading.power == -120
+    assert reading.meter_id == "meter-1"
+    assert SmartMeterReading.from_raw({"id": "meter-2"}).power is None
+
+
+@pytest.fixture
+def account() -> FakeAccount:
+    return FakeAccount.generate(acs=1, smart_meters=1)
+
+
+async def test_smart_meter_sensors(hass, fake_nature: FakeNatureServer, unload_entries) -> None:
+    await async_setup_acs(hass, fake_nature, 1)
+    registry = er.async_get(hass)
+    power = registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}-meter-0000-power")
+    energy = registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}-meter-0000-energy")
+    assert power is not None and energy is not None
+
+    state = hass.states.get(power)
+    assert float(state.state) == 520
+    assert state.attributes["unit_of_measurement"] == UnitOfPower.WATT
+    state = hass.states.get(energy)
+    assert float(state.state) == pytest.approx(12345.6)
+    assert state.attributes["unit_of_measurement"] == UnitOfEnergy.KILO_WATT_HOUR
+
+    # メーター用に別のエンドポイントは叩かない
+    assert fake_nature.count("GET", "/appliances") == 1
+    assert fake_nature.count("GET", "/devices") == 1
+    assert fake_nature.count() == 2
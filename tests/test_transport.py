@@ -0,0 +1,72 @@
+"""API通信の記録（RecordingTransport）と再生（ReplayTransport）"""
+from __future__ import annotations
+
+import json
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from common import DOMAIN
+from fake_nature import FakeNatureServer
+
+from custom_components.hass_nature_remo_climate.api import NatureRemoApi, RemoConnectionError
+from custom_components.hass_nature_remo_climate.const import CONF_APPLIANCE_ID, CONF_TOKEN
+from custom_components.hass_nature_remo_climate.coordinator import RemoAccountCoordinator
+from custom_components.hass_nature_remo_climate.transport import (
+    AiohttpTransport,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+
+async def _record(session, server: FakeNatureServer, path) -> tuple[list, list, dict]:
+    transport = RecordingTransport(AiohttpTransport(session), str(path))
+    api = NatureRemoApi(session, server.token, base_url=server.url, transport=transport, coalesce_window=0)
+    apps = await api._req("GET", "/appliances")
+    devs = await api._req("GET", "/devices")
+    settings = await api.async_set_temperature(server.account.acs[0]["id"], 25)
+    return apps, devs, settings
+
+
+async def test_record_replay_round_trip(session, fake_nature: FakeNatureServer, tmp_path) -> None:
+    path = tmp_path / "traffic.jsonl"
+    apps, devs, settings = await _record(session, fake_nature, path)
+
+    text = path.read_text(encoding="utf-8")
+    assert fake_nature.token not in text
+    records = [json.loads(line) for line in text.splitlines()]
+    assert [(r["method"], r["path"]) for r in records] == [
+        ("GET", "/1/appliances"),
+        ("GET", "/1/devices"),
+        ("POST", f"/1/appliances/{fake_nature.account.acs[0]['id']}/aircon_settings"),
+    ]
+    assert all(r["request_headers"]["Authorization"] == "**REDACTED**" for r in records)
+
+    # 再生はサーバーなしで、記録と同じ応答・レート制限ヘッダを返す
+    replay = ReplayTransport.load(str(path), speed=0)
+    api = NatureRemoApi(None, "another-token", base_url=fake_nature.url, transport=replay, retries=0, coalesce_window=0)
+    fake_nature.reset_counts()
+    assert await api._req("GET", "/appliances") == apps
+    assert await api._req("GET", "/devices") == devs
+    assert await api.async_set_temperature(fake_nature.account.acs[0]["id"], 25) == settings
+    assert api.rate_limit.limit == fake_nature.rate_limit
+    assert replay.replayed == 3
+    assert fake_nature.count() == 0
+    # 記録が尽きたら接続エラー
+    with pytest.raises(RemoConnectionError):
+        await api._req("GET", "/devices")
+
+
+async def test_replay_through_account_coordinator(hass, session, fake_nature: FakeNatureServer, tmp_path) -> None:
+    """記録した通信を、共有ポーラーにそのまま流し込める"""
+    path = tmp_path / "traffic.jsonl"
+    await _record(session, fake_nature, path)
+    ac_id = fake_nature.account.acs[0]["id"]
+
+    hub = RemoAccountCoordinator(hass, "token", transport=ReplayTransport.load(str(path), speed=0))
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_TOKEN: "token", CONF_APPLIANCE_ID: ac_id})
+    hub.members[entry.entry_id] = entry
+    await hub.async_refresh()
+    assert hub.last_update_success
+    assert set(hub.data["appliances"]) == {ac_id}
+    await hub.async_shutdown()
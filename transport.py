@@ -0,0 +1,133 @@
+from __future__ import annotations
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Mapping, Protocol
+from urllib.parse import urlsplit
+import asyncio
+import base64
+import json
+import logging
+import time
+
+import aiohttp
+from multidict import CIMultiDict
+
+_LOGGER = logging.getLogger(__name__)
+
+_REDACTED = "**REDACTED**"
+_REDACT_HEADERS = ("authorization",)
+
+
+class RemoResponse:
+    """トランスポートが返すレスポンス（本文は読み切ったbytes）"""
+
+    __slots__ = ("status", "headers", "body", "content_type")
+
+    def __init__(self, status: int, headers: Mapping[str, str], body: bytes, content_type: str) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.content_type = content_type
+
+
+class RemoTransport(Protocol):
+    """NatureRemoApi._req の下で実際にHTTPを投げる層"""
+
+    async def request(
+        self, method: str, url: str, headers: Mapping[str, str], data: dict[str, Any] | None
+    ) -> RemoResponse: ...
+
+
+class AiohttpTransport:
+    """通常の経路（aiohttp のセッションで送る）"""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self._session = session
+
+    async def request(
+        self, method: str, url: str, headers: Mapping[str, str], data: dict[str, Any] | None
+    ) -> RemoResponse:
+        async with self._session.request(method, url, headers=headers, data=data) as r:
+            body = await r.read()
+            return RemoResponse(r.status, r.headers, body, r.content_type)
+
+
+class RecordingTransport:
+    """下位のトランスポートを通しつつ、リクエスト/レスポンスと所要時間をJSONLに追記する
+
+    Authorization ヘッダは記録しない（マスクする）。
+    """
+
+    def __init__(self, inner: RemoTransport, path: str) -> None:
+        self._inner = inner
+        self._path = path
+        self._write_lock = asyncio.Lock()
+
+    async def request(
+        self, method: str, url: str, headers: Mapping[str, str], data: dict[str, Any] | None
+    ) -> RemoResponse:
+        started_wall = time.time()
+        started = time.monotonic()
+        resp = await self._inner.request(method, url, headers, data)
+        elapsed = time.monotonic() - started
+        line = json.dumps(
+            {
+                "t": started_wall,
+                "elapsed": elapsed,
+                "method": method,
+                "path": urlsplit(url).path,
+                "request_headers": {
+                    k: (_REDACTED if k.lower() in _REDACT_HEADERS else v) for k, v in headers.items()
+                },
+                "data": data,
+                "status": resp.status,
+                "headers": dict(resp.headers),
+                "content_type": resp.content_type,
+                "body": base64.b64encode(resp.body).decode("ascii"),
+            },
+            ensure_ascii=False,
+        )
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, line)
+        return resp
+
+    def _append(self, line: str) -> None:
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class ReplayTransport:
+    """RecordingTransport の記録を決定的に再生する
+
+    (method, path) ごとに記録順で返す。speed は再生速度の倍率（0なら待たない）。
+    ファイルの読み込みは load() で（イベントループの外で）行う。
+    """
+
+    def __init__(self, records: list[dict[str, Any]], speed: float = 1.0) -> None:
+        self._speed = speed
+        self._queues: Dict[tuple[str, str], Deque[dict[str, Any]]] = defaultdict(deque)
+        for rec in records:
+            self._queues[(rec["method"].upper(), rec["path"])].append(rec)
+        self.replayed = 0
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0) -> ReplayTransport:
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return cls(records, speed)
+
+    async def request(
+        self, method: str, url: str, headers: Mapping[str, str], data: dict[str, Any] | None
+    ) -> RemoResponse:
+        queue = self._queues.get((method.upper(), urlsplit(url).path))
+        if not queue:
+            raise aiohttp.ClientConnectionError(f"No recorded response left for {method} {url}")
+        rec = queue.popleft()
+        if self._speed > 0:
+            await asyncio.sleep(rec.get("elapsed", 0.0) / self._speed)
+        self.replayed += 1
+        return RemoResponse(
+            rec["status"],
+            CIMultiDict(rec.get("headers") or {}),
+            base64.b64decode(rec.get("body") or ""),
+            rec.get("content_type") or "application/octet-stream",
+        )